@@ -1,4 +1,41 @@
-from anticipator.integrations import observe
-from anticipator.detection.scanner import scan, scan_async, scan_pipeline
+"""
+anticipator
+~~~~~~~~~~~
+Runtime threat detection for multi-agent AI systems.
 
-__all__ = ["observe", "scan", "scan_async", "scan_pipeline"]
\ No newline at end of file
+Importing the package has no side effects and loads nothing heavy: the
+public names below are imported on first access, the signature bundle on
+the first scan and the SQLite store on the first write.  Call warmup()
+(optionally with background=True) to pay those costs up front.
+"""
+
+import importlib
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from anticipator.integrations import observe
+    from anticipator.detection.scanner import scan, scan_async, scan_pipeline, warmup
+
+# public name → module that defines it
+_EXPORTS = {
+    "observe":       "anticipator.integrations",
+    "scan":          "anticipator.detection.scanner",
+    "scan_async":    "anticipator.detection.scanner",
+    "scan_pipeline": "anticipator.detection.scanner",
+    "warmup":        "anticipator.detection.scanner",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
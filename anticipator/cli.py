@@ -1,11 +1,9 @@
 import os
 import click
-from anticipator.detection.scanner import scan as run_scan
-from anticipator.integrations.exporter import export_json
-from anticipator.integrations.monitor import print_summary
 
+# detection and integration modules are imported by the commands that use
+# them, so `anticipator --help` and unrelated commands start instantly
 EXPORT_PATH = os.getenv("ANTICIPATOR_EXPORTS", "exports")
-os.makedirs(EXPORT_PATH, exist_ok=True)
 
 
 @click.group()
@@ -21,6 +19,8 @@ def main():
 @click.option("--source", default=None, help="Source agent ID")
 def scan(message, agent, source):
     """Scan a message for threats."""
+    from anticipator.detection.scanner import scan as run_scan
+
     result = run_scan(text=message, agent_id=agent, source_agent_id=source)
     if result["detected"]:
         sev = result["severity"]
@@ -37,6 +37,8 @@ def scan(message, agent, source):
 @click.option("--last", default=None, help="Time window e.g. 24h, 7d, 30d")
 def monitor(graph, last):
     """Show persistent threat monitor from SQLite."""
+    from anticipator.integrations.monitor import print_summary
+
     print_summary(graph=graph, last=last)
 
 
@@ -44,9 +46,73 @@ def monitor(graph, last):
 @click.option("--output", default=None, help="Output path for JSON file")
 def export(output):
     """Export JSON threat report."""
+    from anticipator.integrations.exporter import export_json
+
+    os.makedirs(EXPORT_PATH, exist_ok=True)
     export_json(path=output)
     click.echo("✅ JSON report generated.")
 
 
+@main.command("build-signatures")
+@click.option("--cache-dir", default=None,
+              help="Directory for the bundle (default: $ANTICIPATOR_CACHE_DIR or ~/.anticipator/cache)")
+def build_signatures(cache_dir):
+    """Prebuild the signature bundle for fast cold starts."""
+    import time
+    from anticipator.detection.core import bundle
+
+    start = time.perf_counter()
+    path = bundle.build(cache_dir)
+    ms = (time.perf_counter() - start) * 1000
+    if path is None:
+        click.echo(click.style("[ANTICIPATOR] Signature sources not found — bundle not saved", fg="yellow"))
+    else:
+        click.echo(f"✅ Signature bundle written to {path} ({ms:.0f} ms)")
+
+
+@main.command()
+@click.option("--output", default="anticipator_bench.json", help="Where to write the JSON results")
+@click.option("--rounds", default=3, help="Passes over the corpus")
+@click.option("--seed", default=0, help="Corpus seed")
+@click.option("--quick", is_flag=True, help="Fifth-size corpus, one round")
+@click.option("--agent-type", default="default", help="Agent type whose layers are run")
+@click.option("--executor", type=click.Choice(["thread", "process"]), default="thread",
+              help="scan_pipeline() executor")
+@click.option("--compare", "baseline", default=None, type=click.Path(exists=True, dir_okay=False),
+              help="Saved results to compare against; exits 1 on regression")
+@click.option("--tolerance", default=10.0, help="Allowed regression over the baseline, in percent")
+def bench(output, rounds, seed, quick, agent_type, executor, baseline, tolerance):
+    """Benchmark scan latency, throughput and memory."""
+    import json
+    from anticipator import bench as suite
+
+    if quick:
+        rounds = 1
+    report = suite.run(seed=seed, scale=0.2 if quick else 1.0, rounds=rounds,
+                       agent_type=agent_type, executor=executor,
+                       progress=lambda step: click.echo(click.style(f"… {step}", dim=True), err=True))
+    for line in suite.format_report(report):
+        click.echo(line)
+
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    click.echo(f"✅ Results written to {output}")
+
+    if baseline:
+        with open(baseline, encoding="utf-8") as f:
+            saved = json.load(f)
+        try:
+            regressions = suite.compare(report, saved, tolerance)
+        except ValueError as exc:
+            raise click.ClickException(str(exc))
+        if regressions:
+            click.echo(click.style(f"[ANTICIPATOR] ⚠ {len(regressions)} regression(s) "
+                                   f"against {baseline}:", fg="red"))
+            for line in regressions:
+                click.echo(f"  {line}")
+            raise SystemExit(1)
+        click.echo(f"✅ Within {tolerance:g}% of {baseline}")
+
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -1,3 +1,46 @@
-from .scanner import scan, scan_async, scan_pipeline
+import importlib
+from typing import TYPE_CHECKING
 
-__all__ = ["scan", "scan_async", "scan_pipeline"]
\ No newline at end of file
+if TYPE_CHECKING:
+    from .scanner import (scan, scan_async, scan_batch, scan_pipeline, scan_stream,
+                          enable_cache, disable_cache, cache_stats, warmup)
+    from .registry import register_layer, register_agent_type
+    from .session import ScanSession
+    from .windowed import scan_file
+
+# public name → submodule that defines it; imported on first access
+_EXPORTS = {
+    "scan":                ".scanner",
+    "scan_async":          ".scanner",
+    "scan_batch":          ".scanner",
+    "scan_pipeline":       ".scanner",
+    "scan_stream":         ".scanner",
+    "enable_cache":        ".scanner",
+    "disable_cache":       ".scanner",
+    "cache_stats":         ".scanner",
+    "warmup":              ".scanner",
+    "ScanSession":         ".session",
+    "scan_file":           ".windowed",
+    "register_layer":      ".registry",
+    "register_agent_type": ".registry",
+}
+
+__all__ = [
+    "scan", "scan_async", "scan_batch", "scan_pipeline", "scan_stream", "ScanSession",
+    "scan_file",
+    "enable_cache", "disable_cache", "cache_stats", "warmup",
+    "register_layer", "register_agent_type",
+]
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,99 @@
+"""
+anticipator.detection.cache
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+Opt-in verdict cache — bounded LRU with optional TTL, keyed by a blake2b
+digest of (text, agent_type, requested_tool).
+
+Only stateless layer results are cached.  Layers registered as stateful
+(canary, config_drift) depend on state outside the message and always run
+live, so a cached scan still sees a new canary or a drifted config.
+
+    from anticipator.detection import enable_cache, cache_stats
+
+    enable_cache(maxsize=2048, ttl=300)
+    ...
+    cache_stats()   # {"hits": .., "misses": .., "evictions": .., ...}
+
+Cached layer results are shared between scans of the same text; treat
+scan results as read-only.
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+
+def cache_key(text: str, agent_type: str, requested_tool: Optional[str]) -> bytes:
+    h = hashlib.blake2b(digest_size=16)
+    h.update(text.encode("utf-8", "surrogatepass"))
+    h.update(b"\x00")
+    h.update(agent_type.encode("utf-8"))
+    h.update(b"\x00")
+    if requested_tool is not None:
+        h.update(b"\x01")
+        h.update(str(requested_tool).encode("utf-8", "surrogatepass"))
+    return h.digest()
+
+
+class VerdictCache:
+    """Thread-safe LRU of {layer name: result} entries."""
+
+    def __init__(self, maxsize: int = 1024, ttl: Optional[float] = None):
+        if maxsize <= 0:
+            raise ValueError("maxsize must be positive")
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: "OrderedDict[bytes, tuple[float, dict]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: bytes) -> Optional[dict]:
+        """Return the cached layer results for *key*, or None on a miss."""
+        with self._lock:
+            item = self._entries.get(key)
+            if item is not None:
+                expires, layers = item
+                if expires and time.monotonic() >= expires:
+                    del self._entries[key]
+                    self.expirations += 1
+                else:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return layers
+            self.misses += 1
+            return None
+
+    def put(self, key: bytes, layers: dict) -> None:
+        """Store *layers* under *key*; the dict may keep filling in after
+        insertion (layers skipped by an early exit are added on a later
+        scan)."""
+        expires = time.monotonic() + self.ttl if self.ttl else 0.0
+        with self._lock:
+            self._entries[key] = (expires, layers)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size":        len(self._entries),
+                "maxsize":     self.maxsize,
+                "ttl":         self.ttl,
+                "hits":        self.hits,
+                "misses":      self.misses,
+                "evictions":   self.evictions,
+                "expirations": self.expirations,
+                "hit_rate":    round(self.hits / lookups, 4) if lookups else 0.0,
+            }
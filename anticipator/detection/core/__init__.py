@@ -4,6 +4,8 @@ from .entropy   import detect as entropy_detect
 from .heuristic import detect as heuristic_detect
 from .canary    import detect as canary_detect
 from .normalizer import normalize
+from .context   import ScanContext
+from .result    import LayerResult, ScanResult
 
 __all__ = [
     "aho_detect",
@@ -12,4 +14,7 @@ __all__ = [
     "heuristic_detect",
     "canary_detect",
     "normalize",
+    "ScanContext",
+    "LayerResult",
+    "ScanResult",
 ]
\ No newline at end of file
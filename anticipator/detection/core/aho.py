@@ -1,43 +1,15 @@
 import re
-from typing import Any
+from typing import Any, Optional
 
-import ahocorasick
-
-from anticipator.detection.core.normalizer import normalize
-from anticipator.detection.signatures import (
-    ADJECTIVES,
-    DIRECT_PHRASES,
-    OBJECTS,
-    PREPOSITIONS,
-    VERBS,
-)
+from anticipator.detection.core import engine
+from anticipator.detection.core.context import ScanContext
+from anticipator.detection.core.regexset import RegexSet
+from anticipator.detection.core.result import LayerResult
 
 
 _WINDOW = 80
 
 
-def _build(words: list[str]) -> ahocorasick.Automaton:
-    """Build an Aho-Corasick automaton from a flat word/phrase list."""
-    A = ahocorasick.Automaton()
-    seen: set[str] = set()
-    for i, raw in enumerate(words):
-        w = normalize(raw)
-        if w and w not in seen:
-            seen.add(w)
-            A.add_word(w, (i, w))
-    A.make_automaton()
-    return A
-
-
-print("[ANTICIPATOR] Loading detection engine...", flush=True)
-
-_DIRECT_AC = _build(DIRECT_PHRASES)           # ~300 phrases  exact match
-_VERB_AC   = _build(VERBS)                    # ~60  words    proximity trigger
-_OBJECT_AC = _build(OBJECTS)                  # ~60  words    proximity target
-
-print("[ANTICIPATOR] Detection engine ready.", flush=True)
-
-
 _STRUCTURAL: list[tuple[re.Pattern, str]] = [
 
     (re.compile(r'you\s+are\s+now\s+\w',               re.I), 'role_switch'),
@@ -60,47 +32,67 @@ _STRUCTURAL: list[tuple[re.Pattern, str]] = [
     (re.compile(r'(print|dump|show|reveal|output)\s+(your\s+)?(system\s+prompt|env|config|keys?|tokens?)', re.I), 'credential_extraction'),
 ]
 
+_STRUCTURAL_SET = RegexSet(_STRUCTURAL)
 
-def detect(text: str) -> dict:
-    normalized = normalize(text)
-    matches: list[dict[str, Any]] = []
 
-    for end, (_, pattern) in _DIRECT_AC.iter(normalized):
-        start = end - len(pattern) + 1
-        matches.append({
-            "type":    "direct",
-            "pattern": pattern,
-            "span":    (start, end),
-        })
+def detect(text: str, ctx: Optional[ScanContext] = None) -> LayerResult:
+    if ctx is None:
+        ctx = ScanContext(text)
+    # the encoding layer matches the message too; both share one result
+    return ctx.view("aho_result", _detect, ctx)
 
-    for verb_end, (_, verb) in _VERB_AC.iter(normalized):
-        verb_start = verb_end - len(verb) + 1
 
-        win_lo = max(0, verb_start - _WINDOW)
-        win_hi = min(len(normalized), verb_end + _WINDOW)
-        window = normalized[win_lo:win_hi]
+def _detect(ctx: ScanContext) -> LayerResult:
+    normalized = ctx.normalized
+    matches: list[dict[str, Any]] = []
 
-        for _, (_, obj) in _OBJECT_AC.iter(window):
-            matches.append({
-                "type":   "proximity",
-                "verb":   verb,
-                "object": obj,
-                "span":   (verb_start, verb_end),
-            })
-            break   
+    aho_hits = ctx.phrase_hits.get("aho", ())
 
-    for pattern, label in _STRUCTURAL:
-        m = pattern.search(normalized)
-        if m:
+    for h in aho_hits:
+        if h.category == "direct":
             matches.append({
-                "type":    "structural",
-                "pattern": label,
-                "span":    m.span(),
+                "type":    "direct",
+                "pattern": h.phrase,
+                "span":    (h.start, h.end),
             })
 
-    return {
-        "detected": bool(matches),
-        "matches":  matches,
-        "severity": "critical" if matches else "none",
-        "layer":    "aho_corasick",
-    }
\ No newline at end of file
+    # Every verb/object pair with the object wholly inside the verb's
+    # window.  Hits arrive in end order, so a two-pointer join suffices:
+    # the right edge (verb end + window) only grows, and no verb starts
+    # more than the longest phrase before its end, which bounds the left.
+    objects = [h for h in aho_hits if h.category == "object"]
+    slack = engine.longest_phrase() + _WINDOW
+    lo = hi = 0
+    for verb in aho_hits:
+        if verb.category != "verb":
+            continue
+
+        win_lo = max(0, verb.start - _WINDOW)
+        win_hi = min(len(normalized), verb.end + _WINDOW)
+        while lo < len(objects) and objects[lo].end < verb.end - slack:
+            lo += 1
+        while hi < len(objects) and objects[hi].end < win_hi:
+            hi += 1
+
+        for i in range(lo, hi):
+            obj = objects[i]
+            if obj.start >= win_lo:
+                matches.append({
+                    "type":        "proximity",
+                    "verb":        verb.phrase,
+                    "object":      obj.phrase,
+                    "span":        (verb.start, verb.end),
+                    "object_span": (obj.start, obj.end),
+                })
+
+    # normalized text is already lowercase — it doubles as the gate view
+    for idx, m in _STRUCTURAL_SET.matches(normalized, normalized):
+        matches.append({
+            "type":    "structural",
+            "pattern": _STRUCTURAL_SET.labels[idx],
+            "span":    m.span(),
+        })
+
+    if not matches:
+        return LayerResult.clean("aho_corasick", "matches")
+    return LayerResult("aho_corasick", tuple(matches), "critical", key="matches")
\ No newline at end of file
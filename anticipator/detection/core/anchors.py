@@ -0,0 +1,164 @@
+"""
+anticipator.detection.core.anchors
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+AnchorChain — linear-time evaluation of "keyword, gap, keyword" rules.
+
+Rules such as
+
+    (?:what|how).{10,200}(?:what|how).{10,200}(?:bypass|inject)
+
+backtrack through every gap length for every keyword occurrence; on
+keyword-dense text the cost grows with occurrences x gap width x steps.
+An AnchorChain expresses the same rule as a list of anchors and the gap
+allowed between each pair:
+
+    AnchorChain([Anchor(r'what|how'),
+                 Anchor(r'what|how', 10, 200),
+                 Anchor(r'bypass|inject', 10, 200)])
+
+and decides it in one pass per anchor:
+
+  - every occurrence of every anchor is collected by repeated search(),
+    resuming one character past each hit so overlapping occurrences are
+    kept; the regex engine's prefix scan skips everything in between, so
+    Python-level work is per occurrence, not per character
+  - an occurrence is reachable when a reachable occurrence of the previous
+    anchor ends within its gap; reachability is swept forward over the
+    sorted occurrences with a moving frontier, never pairwise
+  - the rule matches when any occurrence of the last anchor is reachable
+
+With DOTALL gaps (".{lo,hi}"), the result is exactly the regex's.  An
+anchor may end in a stretchable run (its "stretch" group, e.g. the \\s+
+after a keyword that a following ".{0,100}" could start inside); the
+occurrence then ends anywhere from one character into the run to its end.
+The rarest anchor — by default the last — is collected first.
+
+AnchorSet holds a list of chains and gates them the way RegexSet gates
+regexes: one Aho-Corasick pass finds which anchors' required literals
+occur, and only chains with every anchor present are searched.  The gate
+runs on a case fold that also maps the few non-ASCII characters
+re.IGNORECASE matches to ASCII letters (U+0130, U+0131, U+017F, U+212A),
+so it never rejects text the regexes would accept.
+"""
+
+import re
+from typing import List, NamedTuple, Optional
+
+import ahocorasick
+
+from anticipator.detection.core.prefilter import _FOLD, required_literals
+
+
+class Anchor(NamedTuple):
+    pattern: str
+    lo: int = 0           # gap from the previous anchor's end to this start
+    hi: int = 0
+    flags: int = re.IGNORECASE
+
+
+class AnchorChain:
+    """A sequence of anchors with bounded gaps, matched as one rule."""
+
+    def __init__(self, anchors: List[Anchor]):
+        self.anchors = anchors
+        self._finders = [re.compile(a.pattern, a.flags) for a in anchors]
+        # collect the last anchor (the payload keyword) first
+        self._order = [len(anchors) - 1] + list(range(len(anchors) - 1))
+
+    def _occurrences(self, i: int, text: str) -> list:
+        """[(start, min end, max end)] for anchor *i*, in start order."""
+        finder = self._finders[i]
+        stretch = "stretch" in finder.groupindex
+        out = []
+        m = finder.search(text)
+        while m:
+            start, end = m.span()
+            out.append((start, m.start("stretch") + 1 if stretch else end, end))
+            m = finder.search(text, start + 1)
+        return out
+
+    def search(self, text: str) -> bool:
+        if len(self.anchors) == 1:
+            return self._finders[0].search(text) is not None
+        occurrences: list[Optional[list]] = [None] * len(self.anchors)
+        for i in self._order:
+            occurrences[i] = self._occurrences(i, text)
+            if not occurrences[i]:
+                return False
+
+        reachable = occurrences[0]
+        for anchor, hits in zip(self.anchors[1:], occurrences[1:]):
+            # each reachable occurrence admits next starts in
+            # [min end + lo, max end + hi]; merge those windows in order
+            windows = sorted((lo_end + anchor.lo, hi_end + anchor.hi)
+                             for _, lo_end, hi_end in reachable)
+            merged: list[list[int]] = []
+            for a, b in windows:
+                if merged and a <= merged[-1][1]:
+                    if b > merged[-1][1]:
+                        merged[-1][1] = b
+                else:
+                    merged.append([a, b])
+
+            nxt, w = [], 0
+            for hit in hits:
+                start = hit[0]
+                while w < len(merged) and merged[w][1] < start:
+                    w += 1
+                if w == len(merged):
+                    break
+                if merged[w][0] <= start:
+                    nxt.append(hit)
+            if not nxt:
+                return False
+            reachable = nxt
+        return True
+
+
+class AnchorSet:
+    """A list of (AnchorChain, label) rules; first() mirrors RegexSet.first()."""
+
+    def __init__(self, rules: List[tuple], min_literal: int = 2):
+        self.chains = [chain for chain, _ in rules]
+        self.labels = [label for _, label in rules]
+
+        # per chain, one literal group per gated anchor: {literal: [(chain, anchor)]}
+        self._needs: list[set] = [set() for _ in self.chains]
+        literals: dict[str, list[tuple[int, int]]] = {}
+        for c, chain in enumerate(self.chains):
+            for a, anchor in enumerate(chain.anchors):
+                # a bare "a|b|c" anchor only yields literals as a group
+                lits = (required_literals(anchor.pattern)
+                        or required_literals(f"(?:{anchor.pattern})"))
+                if not lits or min(len(x) for x in lits) < min_literal:
+                    continue
+                self._needs[c].add(a)
+                for lit in lits:
+                    literals.setdefault(lit.lower(), []).append((c, a))
+
+        self._gate = None
+        if literals:
+            self._gate = ahocorasick.Automaton()
+            for lit, owners in literals.items():
+                self._gate.add_word(lit, tuple(owners))
+            self._gate.make_automaton()
+
+    def __len__(self) -> int:
+        return len(self.chains)
+
+    def _candidates(self, text: str) -> list:
+        """Indices of chains whose every gated anchor has a literal in *text*."""
+        if self._gate is None:
+            return list(range(len(self.chains)))
+        present: set = set()
+        for _, owners in self._gate.iter(text.translate(_FOLD)):
+            present.update(owners)
+        return [c for c, needs in enumerate(self._needs)
+                if all((c, a) in present for a in needs)]
+
+    def first(self, text: str) -> Optional[int]:
+        """Index of the first rule, in list order, that matches *text*."""
+        for idx in self._candidates(text):
+            if self.chains[idx].search(text):
+                return idx
+        return None
@@ -0,0 +1,70 @@
+"""
+anticipator.detection.core.batchstats
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+Token entropy for a whole batch of messages in a few NumPy array
+operations, seeded into each message's ScanContext by scan_batch().
+
+Every entropy candidate token in the batch is concatenated into one UTF-32
+codepoint array; a single (token, codepoint) histogram gives each token's
+character frequencies, and the entropies fall out of one weighted bincount.
+
+The per-message heuristic statistics (punctuation count, all-caps,
+zero-width) are not vectorized here: str.translate / str.upper / one regex
+search already run them in C, and on measurement a codepoint-array version
+was slower once the array had to be built.
+
+NumPy is optional, and imported on the first available() call rather
+than with this module.  Without it, available() is False and scan_batch()
+lets the entropy layer compute its token entropies per message as scan()
+does.
+"""
+
+from typing import List, Optional
+
+np = None
+_imported = False
+
+
+def available() -> bool:
+    global np, _imported
+    if not _imported:
+        try:
+            import numpy
+            np = numpy
+        except ImportError:          # pragma: no cover - optional dependency
+            pass
+        _imported = True
+    return np is not None
+
+
+def _codepoints(texts: List[str]):
+    """Return (codepoints, per-text lengths) for *texts* concatenated."""
+    lengths = np.fromiter((len(t) for t in texts), dtype=np.int64, count=len(texts))
+    joined = "".join(texts)
+    cps = np.frombuffer(joined.encode("utf-32-le", "surrogatepass"), dtype=np.uint32)
+    return cps, lengths
+
+
+def token_entropies(token_lists: List[List[str]]) -> Optional[List[List[float]]]:
+    """Shannon entropy of every token, grouped like *token_lists*, or None
+    when NumPy is unavailable."""
+    if not available():
+        return None
+    flat = [tok for tokens in token_lists for tok in tokens]
+    if not flat:
+        return [[] for _ in token_lists]
+
+    cps, lengths = _codepoints(flat)
+    tok_id = np.repeat(np.arange(len(flat), dtype=np.int64), lengths)
+    # histogram of (token, codepoint) pairs
+    pairs, counts = np.unique(tok_id * 0x110000 + cps, return_counts=True)
+    owner = pairs // 0x110000
+    p = counts / lengths[owner]
+    entropy = np.bincount(owner, weights=-p * np.log2(p), minlength=len(flat))
+
+    values = entropy.tolist()
+    out, pos = [], 0
+    for tokens in token_lists:
+        out.append(values[pos:pos + len(tokens)])
+        pos += len(tokens)
+    return out
@@ -0,0 +1,184 @@
+"""
+anticipator.detection.core.bundle
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+Signature bundle — the prebuilt matchers the detection layers share,
+pickled to disk so a new process loads them instead of rebuilding them.
+
+    phrases      the unified phrase automaton (see core.engine)
+    credentials  the credential prefilter's anchor index (see
+                 core.prefilter.build_index)
+
+The bundle file is named after a BLAKE2b digest of everything it is built
+from — the signature modules, the code that normalizes and indexes them,
+the Python version and the installed pyahocorasick extension — so an
+edited signature list or an upgrade simply misses the cache and the
+bundle is rebuilt and saved again.  A file that cannot be read or
+unpickled is treated the same way; a cache directory that cannot be
+written only costs the rebuild.
+
+The cache directory is $ANTICIPATOR_CACHE_DIR, else ~/.anticipator/cache.
+Bundles are unpickled, and their names are predictable, so a bundle is
+only loaded from a file owned by the current user and writable by no one
+else (POSIX); any other file is ignored and the bundle is built in memory
+without touching it.  The directory is created with mode 0o700.
+Prebuild with ``anticipator build-signatures`` (e.g. at image build
+time, as the user that scans) to take the rebuild off every cold start.
+"""
+
+import hashlib
+import logging
+import os
+import pickle
+import stat
+import sys
+import tempfile
+import threading
+import time
+from typing import Optional, Tuple
+
+import ahocorasick
+
+log = logging.getLogger(__name__)
+
+# bump when the bundle layout changes
+BUNDLE_VERSION = 1
+
+_DETECTION = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# every source file whose contents shape the bundle
+_SOURCES = (
+    "signatures.py",
+    "core/bundle.py",
+    "core/engine.py",
+    "core/normalizer.py",
+    "core/prefilter.py",
+    "extended/homoglyph.py",
+    "extended/path_traversal.py",
+    "extended/threat_categories.py",
+)
+
+_bundle: Optional[dict] = None
+_lock = threading.Lock()
+
+
+def cache_dir() -> str:
+    return os.getenv("ANTICIPATOR_CACHE_DIR") or os.path.join(
+        os.path.expanduser("~"), ".anticipator", "cache")
+
+
+def source_hash() -> Optional[str]:
+    """Digest of the bundle's inputs, or None if a source file cannot be
+    read (the bundle is then built in memory only)."""
+    h = hashlib.blake2b(digest_size=16)
+    h.update(f"{BUNDLE_VERSION}:{sys.version_info[:2]}:{pickle.HIGHEST_PROTOCOL}".encode())
+    try:
+        ext = ahocorasick.__file__
+        h.update(f"{os.path.basename(ext)}:{os.path.getsize(ext)}".encode())
+        for name in _SOURCES:
+            with open(os.path.join(_DETECTION, name), "rb") as f:
+                h.update(f.read())
+    except (OSError, TypeError):
+        return None
+    return h.hexdigest()
+
+
+def bundle_path(directory: Optional[str] = None) -> Optional[str]:
+    digest = source_hash()
+    if digest is None:
+        return None
+    return os.path.join(directory or cache_dir(), f"signatures-{digest}.pickle")
+
+
+def _build() -> dict:
+    from anticipator.detection.core import engine, prefilter
+    from anticipator.detection.signatures import CREDENTIAL_PATTERNS
+
+    return {
+        "phrases":     engine._build(),
+        "credentials": prefilter.build_index(CREDENTIAL_PATTERNS),
+    }
+
+
+def _trusted(st: os.stat_result) -> bool:
+    """Whether a file with stat *st* is safe to unpickle: owned by this
+    user and not writable by group or others."""
+    getuid = getattr(os, "getuid", None)
+    if getuid is None:          # no POSIX ownership to check
+        return True
+    return st.st_uid == getuid() and not st.st_mode & (stat.S_IWGRP | stat.S_IWOTH)
+
+
+def _read(path: str) -> Tuple[Optional[dict], bool]:
+    """Return (bundle or None, whether a rebuilt bundle may be saved at
+    *path*) — False for a file we must neither load nor replace."""
+    try:
+        with open(path, "rb") as f:
+            if not _trusted(os.fstat(f.fileno())):
+                log.warning("[ANTICIPATOR] Ignoring signature bundle %s: not owned by this "
+                            "user or writable by others", path)
+                return None, False
+            bundle = pickle.load(f)
+    except FileNotFoundError:
+        return None, True
+    except Exception as exc:
+        log.warning("[ANTICIPATOR] Ignoring unreadable signature bundle %s: %s", path, exc)
+        return None, True
+    return (bundle, True) if isinstance(bundle, dict) else (None, True)
+
+
+def _write(path: str, bundle: dict) -> None:
+    """Write *bundle* atomically: concurrent writers race harmlessly and a
+    reader never sees a partial file."""
+    directory = os.path.dirname(path)
+    os.makedirs(directory, mode=0o700, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=directory, prefix=".signatures-", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            pickle.dump(bundle, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+
+
+def build(directory: Optional[str] = None) -> Optional[str]:
+    """Build the bundle, save it under *directory* (default: cache_dir())
+    and return its path — None if the sources cannot be hashed."""
+    global _bundle
+    bundle = _build()
+    path = bundle_path(directory)
+    if path is not None:
+        _write(path, bundle)
+    with _lock:
+        _bundle = bundle
+    return path
+
+
+def load() -> dict:
+    """The signature bundle: from this process, the cache, or built (and
+    cached) now."""
+    global _bundle
+    if _bundle is not None:
+        return _bundle
+    with _lock:
+        if _bundle is None:
+            start = time.perf_counter()
+            path = bundle_path()
+            bundle, save = _read(path) if path is not None else (None, False)
+            if bundle is not None:
+                log.debug("[ANTICIPATOR] Loaded signature bundle %s in %.1f ms",
+                          path, (time.perf_counter() - start) * 1000)
+            else:
+                bundle = _build()
+                log.info("[ANTICIPATOR] Built signature bundle in %.1f ms",
+                         (time.perf_counter() - start) * 1000)
+                if save:
+                    try:
+                        _write(path, bundle)
+                    except OSError as exc:
+                        log.debug("[ANTICIPATOR] Could not cache signature bundle: %s", exc)
+            _bundle = bundle
+    return _bundle
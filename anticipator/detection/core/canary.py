@@ -1,39 +1,194 @@
+"""
+anticipator.detection.core.canary
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+Canary traps — unique tokens planted in one agent's context; seeing one in
+another agent's input means that context leaked.
+
+    canary = generate_canary("planner", scope="run-42")
+    ...
+    release_canaries("run-42")          # the run is over
+
+Every canary has the fixed shape ``__anticipator_<16 hex>__``, so detect()
+finds all of them in a message with one regex pass (after a substring
+check that rejects almost every message) and resolves each with a dict
+lookup — the cost does not grow with the number of canaries issued.
+
+Canaries live in a bounded, thread-safe CanaryStore:
+
+  - an agent holds one canary per scope (a graph, a run, a session);
+    issuing a new one retires the old
+  - release(scope) drops a whole scope at once
+  - beyond *maxsize* canaries the least recently issued or seen are
+    evicted, and with *ttl* set they expire after that many seconds
+
+configure_canaries() replaces the module-wide store.
+"""
+
+import re
 import secrets
-from typing import Optional
+import threading
+import time
+from collections import OrderedDict
+from typing import NamedTuple, Optional
+
+from .result import LayerResult
+
+CANARY_PREFIX = "__anticipator_"
+CANARY_PATTERN = re.compile(r'__anticipator_[0-9a-f]{16}__')
+
+
+class CanaryOwner(NamedTuple):
+    agent_id: str
+    scope: Optional[str]
+    expires: float
+
+
+class CanaryStore:
+    """Thread-safe LRU of canary → owner, with a (scope, agent) index."""
+
+    def __init__(self, maxsize: int = 100_000, ttl: Optional[float] = None):
+        if maxsize <= 0:
+            raise ValueError("maxsize must be positive")
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._owners: "OrderedDict[str, CanaryOwner]" = OrderedDict()
+        self._by_agent: dict[tuple, str] = {}
+        self._by_scope: dict[Optional[str], set] = {}
+        self._lock = threading.Lock()
+        self.evictions = 0
+        self.expirations = 0
+
+    def _drop(self, canary: str) -> None:
+        owner = self._owners.pop(canary)
+        key = (owner.scope, owner.agent_id)
+        if self._by_agent.get(key) == canary:
+            del self._by_agent[key]
+        members = self._by_scope.get(owner.scope)
+        if members is not None:
+            members.discard(canary)
+            if not members:
+                del self._by_scope[owner.scope]
+
+    def issue(self, agent_id: str, scope: Optional[str] = None) -> str:
+        """Issue a fresh canary for *agent_id* in *scope*, retiring the
+        agent's previous one there."""
+        canary = f"{CANARY_PREFIX}{secrets.token_hex(8)}__"
+        expires = time.monotonic() + self.ttl if self.ttl else 0.0
+        with self._lock:
+            previous = self._by_agent.get((scope, agent_id))
+            if previous is not None:
+                self._drop(previous)
+            self._owners[canary] = CanaryOwner(agent_id, scope, expires)
+            self._by_agent[(scope, agent_id)] = canary
+            self._by_scope.setdefault(scope, set()).add(canary)
+            while len(self._owners) > self.maxsize:
+                self._drop(next(iter(self._owners)))
+                self.evictions += 1
+        return canary
+
+    def _live(self, canary: str) -> Optional[CanaryOwner]:
+        owner = self._owners.get(canary)
+        if owner is not None and owner.expires and time.monotonic() >= owner.expires:
+            self._drop(canary)
+            self.expirations += 1
+            return None
+        return owner
+
+    def get(self, agent_id: str, scope: Optional[str] = None) -> Optional[str]:
+        """The agent's current canary in *scope*, if it has one."""
+        with self._lock:
+            canary = self._by_agent.get((scope, agent_id))
+            if canary is None or self._live(canary) is None:
+                return None
+            return canary
 
-_canary_store: dict = {}
+    def owner(self, canary: str) -> Optional[CanaryOwner]:
+        """Who *canary* was issued to, or None if it is unknown, evicted
+        or expired."""
+        with self._lock:
+            owner = self._live(canary)
+            if owner is not None:
+                self._owners.move_to_end(canary)
+            return owner
 
-def generate_canary(agent_id: str) -> str:
-    canary = f"__anticipator_{secrets.token_hex(8)}__"
-    _canary_store[agent_id] = canary
-    return canary
+    def release(self, scope: Optional[str]) -> int:
+        """Drop every canary issued in *scope*; return how many."""
+        with self._lock:
+            members = list(self._by_scope.get(scope, ()))
+            for canary in members:
+                self._drop(canary)
+            return len(members)
 
+    def clear(self) -> None:
+        with self._lock:
+            self._owners.clear()
+            self._by_agent.clear()
+            self._by_scope.clear()
 
-def get_canary(agent_id: str) -> Optional[str]:
-    return _canary_store.get(agent_id)
+    def __len__(self) -> int:
+        return len(self._owners)
 
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "size":        len(self._owners),
+                "maxsize":     self.maxsize,
+                "ttl":         self.ttl,
+                "scopes":      len(self._by_scope),
+                "evictions":   self.evictions,
+                "expirations": self.expirations,
+            }
 
-def inject_canary(text: str, agent_id: str) -> str:
-    canary = generate_canary(agent_id)
+
+_store = CanaryStore()
+
+
+def configure_canaries(maxsize: int = 100_000, ttl: Optional[float] = None) -> None:
+    """Replace the canary store with an empty one of the given bounds."""
+    global _store
+    _store = CanaryStore(maxsize=maxsize, ttl=ttl)
+
+
+def canary_stats() -> dict:
+    return _store.stats()
+
+
+def generate_canary(agent_id: str, scope: Optional[str] = None) -> str:
+    return _store.issue(agent_id, scope)
+
+
+def get_canary(agent_id: str, scope: Optional[str] = None) -> Optional[str]:
+    return _store.get(agent_id, scope)
+
+
+def release_canaries(scope: Optional[str]) -> int:
+    return _store.release(scope)
+
+
+def inject_canary(text: str, agent_id: str, scope: Optional[str] = None) -> str:
+    canary = generate_canary(agent_id, scope)
     return f"{text}\n<!-- {canary} -->"
 
 
-def detect(text: str, source_agent_id: str, current_agent_id: str) -> dict:
-    findings = []
+def detect(text: str, source_agent_id: str, current_agent_id: str) -> LayerResult:
+    if CANARY_PREFIX not in text:
+        return LayerResult.clean("canary_trap")
 
-    for agent_id, canary in _canary_store.items():
-        if agent_id == current_agent_id:
+    findings = []
+    store = _store
+    for canary in dict.fromkeys(CANARY_PATTERN.findall(text)):
+        owner = store.owner(canary)
+        if owner is None or owner.agent_id == current_agent_id:
             continue
-        if canary in text:
-            findings.append({
-                "leaked_from_agent": agent_id,
-                "found_in_agent": current_agent_id,
-                "canary": canary
-            })
-
-    return {
-        "detected": len(findings) > 0,
-        "findings": findings,
-        "severity": "critical" if findings else "none",
-        "layer": "canary_trap"
-    }
+        finding = {
+            "leaked_from_agent": owner.agent_id,
+            "found_in_agent": current_agent_id,
+            "canary": canary
+        }
+        if owner.scope is not None:
+            finding["scope"] = owner.scope
+        findings.append(finding)
+
+    if not findings:
+        return LayerResult.clean("canary_trap")
+    return LayerResult("canary_trap", tuple(findings), "critical")
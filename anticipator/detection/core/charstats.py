@@ -0,0 +1,73 @@
+"""
+anticipator.detection.core.charstats
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+CharStats — one record of character and token statistics per message,
+computed once and shared through ScanContext.char_stats.
+
+    stats = ctx.char_stats
+    stats.punctuation / stats.length     # share of ASCII punctuation
+    stats.zero_width                     # zero-width characters present
+    stats.mixed_script                   # a word mixes ASCII and non-ASCII
+
+Every field comes from a C-level str or bytes method (translate, count,
+upper, isascii) or from the whitespace token list the context already
+holds; no statistic walks the text character by character in Python.
+ASCII punctuation is counted on the UTF-8 bytes, where bytes.translate()
+is a plain table lookup (ASCII bytes never occur inside a multi-byte
+sequence).  ASCII-only text skips the non-ASCII statistics outright.
+"""
+
+import re
+import string
+from typing import List, NamedTuple
+
+# tokens longer than this are collected in CharStats.long_tokens
+LONG_TOKEN = 60
+
+_PUNCTUATION = string.punctuation.encode("ascii")
+_ZERO_WIDTH_CHARS = ("\u200b", "\u200c", "\u200d", "\u2060", "\ufeff")
+_ASCII_LETTER = re.compile(r'[A-Za-z]')
+_CONSTANT_LIKE = re.compile(r'^[A-Z][A-Z0-9_]{2,}$')
+
+
+class CharStats(NamedTuple):
+    length: int
+    ascii: bool                 # no character above U+007F
+    punctuation: int            # ASCII punctuation characters
+    zero_width: int             # U+200B-U+200D, U+2060, U+FEFF
+    has_alpha: bool
+    no_lowercase: bool          # text.upper() == text
+    tokens: int
+    longest_token: int
+    long_tokens: tuple          # tokens over LONG_TOKEN chars, in order
+    all_constants: bool         # every token looks like CONSTANT_NAME
+    mixed_script: bool          # a 4+ char token has ASCII letters and non-ASCII
+
+
+def char_stats(text: str, tokens: List[str]) -> CharStats:
+    """Compute the CharStats of *text*, whose whitespace tokens are *tokens*."""
+    is_ascii = text.isascii()
+
+    if is_ascii:
+        zero_width, mixed = 0, False
+    else:
+        zero_width = sum(map(text.count, _ZERO_WIDTH_CHARS))
+        mixed = any(len(word) >= 4 and not word.isascii() and _ASCII_LETTER.search(word)
+                    for word in tokens)
+    raw = text.encode("utf-8", "surrogatepass")
+    longest = max(map(len, tokens), default=0)
+
+    return CharStats(
+        length=len(text),
+        ascii=is_ascii,
+        punctuation=len(raw) - len(raw.translate(None, _PUNCTUATION)),
+        zero_width=zero_width,
+        has_alpha=any(map(str.isalpha, text)),
+        no_lowercase=text.upper() == text,
+        tokens=len(tokens),
+        longest_token=longest,
+        long_tokens=(tuple(word for word in tokens if len(word) > LONG_TOKEN)
+                     if longest > LONG_TOKEN else ()),
+        all_constants=all(_CONSTANT_LIKE.match(word) for word in tokens),
+        mixed_script=mixed,
+    )
@@ -0,0 +1,111 @@
+"""
+anticipator.detection.core.context
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+Per-message scan context — the derived views every layer needs, computed
+at most once per scan and shared across layers.
+
+    ctx = ScanContext(text)
+    ctx.normalized      # NFKC + zero-width strip + lower + collapsed whitespace
+    ctx.lower           # plain text.lower()
+    ctx.folded          # homoglyph-folded, lowercased
+    ctx.tokens          # whitespace token stream (text.split())
+    ctx.char_stats      # CharStats record: class counts, tokens, script mix
+    ctx.phrase_hits     # shared phrase-engine hits over ctx.normalized
+    ctx.lower_hits      # phrase-engine hits over ctx.lower
+    ctx.folded_hits     # phrase-engine hits over ctx.folded
+    ctx.timings         # {view name: ms spent computing it}
+
+Layers that need something more specific memoize it through view().
+Timings are inclusive: a view that pulls in another view on first access
+also carries that view's cost.
+
+The context also carries the scan's non-text inputs (agent ids, requested
+tool, config) so the layer registry can bind each layer's arguments.
+"""
+
+import time
+from typing import Any, Callable, Optional
+
+from anticipator.detection.core import engine
+from anticipator.detection.core.charstats import CharStats, char_stats
+from anticipator.detection.core.normalizer import normalize
+
+
+def _lower_hits(ctx: "ScanContext") -> dict:
+    # one walk serves both views when normalizing changed nothing but case
+    lower = ctx.lower
+    return ctx.phrase_hits if lower == ctx.normalized else engine.match(lower)
+
+
+def _fold(text: str) -> str:
+    from anticipator.detection.extended.homoglyph import normalize_homoglyphs
+    return normalize_homoglyphs(text).lower()
+
+
+class ScanContext:
+    """Lazily populated cache of derived views for one message."""
+
+    __slots__ = ("text", "agent_id", "source_agent_id", "requested_tool",
+                 "config", "timings", "_views")
+
+    def __init__(self, text: str, agent_id: str = "unknown",
+                 source_agent_id: Optional[str] = None,
+                 requested_tool: Optional[str] = None,
+                 config: Optional[dict] = None):
+        self.text = text
+        self.agent_id = agent_id
+        self.source_agent_id = source_agent_id
+        self.requested_tool = requested_tool
+        self.config = config
+        self.timings: dict[str, float] = {}
+        self._views: dict[str, Any] = {}
+
+    def view(self, name: str, compute: Callable, *args) -> Any:
+        """Return view *name*, computing it as compute(*args) on first use."""
+        try:
+            return self._views[name]
+        except KeyError:
+            pass
+        start = time.perf_counter()
+        value = self._views[name] = compute(*args)
+        self.timings[name] = round((time.perf_counter() - start) * 1000, 3)
+        return value
+
+    def seed(self, name: str, value: Any) -> None:
+        """Pre-populate view *name*, e.g. with statistics computed for a
+        whole batch at once (see core.batchstats)."""
+        self._views[name] = value
+
+    @property
+    def normalized(self) -> str:
+        return self.view("normalized", normalize, self.text)
+
+    @property
+    def lower(self) -> str:
+        return self.view("lower", str.lower, self.text)
+
+    @property
+    def folded(self) -> str:
+        return self.view("folded", _fold, self.text)
+
+    @property
+    def tokens(self) -> list:
+        return self.view("tokens", str.split, self.text)
+
+    @property
+    def char_stats(self) -> CharStats:
+        return self.view("char_stats", char_stats, self.text, self.tokens)
+
+    @property
+    def phrase_hits(self) -> dict:
+        return self.view("phrase_hits", engine.match, self.normalized)
+
+    @property
+    def lower_hits(self) -> dict:
+        """Hits over plain text.lower(), for layers whose phrases have
+        always been matched there rather than on the normalized text."""
+        return self.view("lower_hits", _lower_hits, self)
+
+    @property
+    def folded_hits(self) -> dict:
+        return self.view("folded_hits", engine.match, self.folded)
@@ -1,87 +1,286 @@
+"""
+anticipator.detection.core.encoding
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+Encoding layer — follow hex, base64 and URL encodings down to MAX_DEPTH
+and scan what they hide.
+
+The payloads reachable from a message form a small graph, walked depth
+first under a per-message DecodeBudget:
+
+  - at most MAX_NODES payloads are decoded, and MAX_DECODED_BYTES in all;
+    a candidate that would overrun the byte budget is decoded only as far
+    as it reaches, and the layer result then carries budget_exhausted
+  - candidates are sniffed before the full decode: the first SNIFF_CHARS
+    are decoded alone and must look like text — valid UTF-8 (a sequence cut
+    off at the end is fine) with at most 1 - MIN_PRINTABLE control bytes —
+    so long identifiers and random blobs cost a few dozen bytes, not a
+    decode of the whole run
+  - repeated candidates and repeated payloads are recognized by a 16-byte
+    BLAKE2b digest, so neither full texts nor duplicate work are kept
+
+The message itself is only matched against the phrase engine, sharing
+the aho layer's result (every other layer sees it directly); each decoded
+payload is rescanned by every text layer in the registry (see
+registry.text_stages()).
+"""
+
 import base64
+import binascii
+import hashlib
 import re
+import warnings
 from urllib.parse import unquote
 from typing import Optional, List, Dict, Set
 from . import aho
+from .context import ScanContext
+from .result import LayerResult, _as_layer_result
 
 MAX_DEPTH = 3
+# per-message ceilings on the decode graph
+MAX_NODES = 32
+MAX_DECODED_BYTES = 64 * 1024
+# share of a decoded payload's bytes that must not be control bytes
+MIN_PRINTABLE = 0.9
+# encoded characters decoded up front to sniff a long candidate
+SNIFF_CHARS = 64
 
 HEX_PATTERN = re.compile(r'\b(?:[0-9a-fA-F]{2}){20,}\b')
 BASE64_PATTERN = re.compile(r'(?:[A-Za-z0-9+/]{4}){5,}(?:==|=)?')
 
-def decode_base64(text: str) -> Optional[str]:
+# C0 controls other than tab, newline and carriage return, plus DEL
+_CONTROL_BYTES = bytes(b for b in range(32) if b not in (9, 10, 13)) + b"\x7f"
+
+
+def _base64_bytes(text: str) -> Optional[bytes]:
     try:
         padding = len(text) % 4
         if padding:
             text += "=" * (4 - padding)
+        return base64.b64decode(text)
+    except (binascii.Error, ValueError):
+        return None
+
+
+def _hex_bytes(text: str) -> Optional[bytes]:
+    try:
+        return bytes.fromhex(text)
+    except ValueError:
+        return None
+
 
-        decoded_bytes = base64.b64decode(text)
-        return decoded_bytes.decode("utf-8")
-    except Exception:
+def decode_base64(text: str) -> Optional[str]:
+    try:
+        return _base64_bytes(text).decode("utf-8")
+    except (AttributeError, UnicodeDecodeError):
         return None
 
+
 def decode_hex(text: str) -> Optional[str]:
     try:
-        return bytes.fromhex(text).decode("utf-8")
-    except Exception:
+        return _hex_bytes(text).decode("utf-8")
+    except (AttributeError, UnicodeDecodeError):
         return None
 
+
+def _plausible(raw: bytes, prefix: bool = False) -> bool:
+    """Whether *raw* looks like text: few control bytes and valid UTF-8.
+    With *prefix*, a multi-byte sequence cut off at the end is allowed."""
+    if not raw:
+        return False
+    controls = len(raw) - len(raw.translate(None, _CONTROL_BYTES))
+    if controls > len(raw) * (1 - MIN_PRINTABLE):
+        return False
+    try:
+        raw.decode("utf-8")
+    except UnicodeDecodeError as e:
+        return prefix and e.reason == "unexpected end of data"
+    return True
+
+
+def _digest(data: bytes) -> bytes:
+    return hashlib.blake2b(data, digest_size=16).digest()
+
+
+# kind → (decoder to bytes, encoded chars per unit, decoded bytes per unit)
+_DECODERS = {
+    "hex":    (_hex_bytes, 2, 1),
+    "base64": (_base64_bytes, 4, 3),
+}
+
+
+class DecodeBudget:
+    """Node and byte allowance for one message's decode graph, plus the
+    digests of every candidate and payload already handled."""
+
+    __slots__ = ("nodes", "decoded_bytes", "exhausted", "_candidates", "_payloads")
+
+    def __init__(self, nodes: int = MAX_NODES, decoded_bytes: int = MAX_DECODED_BYTES):
+        self.nodes = nodes
+        self.decoded_bytes = decoded_bytes
+        self.exhausted = False
+        self._candidates: set = set()
+        self._payloads: set = set()
+
+    def new_payload(self, raw: bytes) -> bool:
+        """Record payload *raw*; False if it was seen before."""
+        key = _digest(raw)
+        if key in self._payloads:
+            return False
+        self._payloads.add(key)
+        return True
+
+    def _admit(self, size: int) -> int:
+        """Bytes *size* may use of the budget; marks it exhausted when
+        that is less than *size*."""
+        allowed = min(size, self.decoded_bytes) if self.nodes > 0 else 0
+        if allowed < size:
+            self.exhausted = True
+        return allowed
+
+    def _spend(self, size: int) -> None:
+        self.nodes -= 1
+        self.decoded_bytes -= size
+
+    def decode(self, kind: str, candidate: str) -> Optional[str]:
+        """Decode *candidate* as *kind*, or None if it is a repeat, fails
+        the sniff or does not decode to new, plausible text.  A candidate
+        larger than what is left of the byte budget is decoded only as far
+        as the budget reaches."""
+        key = _digest(f"{kind}:{candidate}".encode("ascii"))
+        if key in self._candidates:
+            return None
+        self._candidates.add(key)
+
+        decoder, chars, unit = _DECODERS[kind]
+        if len(candidate) > SNIFF_CHARS + 2:
+            head = decoder(candidate[:SNIFF_CHARS])
+            if head is None or not _plausible(head, prefix=True):
+                return None
+
+        size = len(candidate) // chars * unit
+        allowed = self._admit(size)
+        truncated = allowed < size
+        if truncated:
+            candidate = candidate[:allowed // unit * chars]
+            if not candidate:
+                return None
+
+        raw = decoder(candidate)
+        if raw is None:
+            return None
+        self._spend(len(raw))
+        if not _plausible(raw, prefix=truncated) or not self.new_payload(raw):
+            return None
+        return raw.decode("utf-8", "ignore" if truncated else "strict")
+
+    def unquote(self, text: str) -> Optional[str]:
+        """URL-decode *text*, or None if nothing changes or the result was
+        seen before; cut to what is left of the byte budget."""
+        decoded = unquote(text)
+        if decoded == text:
+            return None
+        raw = decoded.encode("utf-8", "surrogatepass")
+        allowed = self._admit(len(raw))
+        if not allowed:
+            return None
+        if allowed < len(raw):
+            raw = raw[:allowed]
+            decoded = raw.decode("utf-8", "ignore")
+        self._spend(len(raw))
+        return decoded if self.new_payload(raw) else None
+
+
+def _rescan(text: str, ctx: Optional[ScanContext]) -> Dict[str, tuple]:
+    """Run every text layer over decoded *text*; {layer: findings} for
+    the layers that detect something."""
+    from anticipator.detection.registry import text_stages
+
+    # a payload carries no tool request of its own — only its text is judged
+    child = ScanContext(text, ctx.agent_id) if ctx is not None else ScanContext(text)
+    layers = {}
+    for stage in text_stages():
+        result = _as_layer_result(stage.call(child))
+        if result.detected:
+            layers[stage.name] = result.findings
+    return layers
+
+
 def recursive_scan(text: str,
                    depth: int = 0,
-                   seen_texts: Optional[Set[str]] = None) -> List[Dict]:
+                   seen_texts: Optional[Set[str]] = None,
+                   ctx: Optional[ScanContext] = None,
+                   *,
+                   budget: Optional[DecodeBudget] = None) -> List[Dict]:
+    """Findings for *text* and every payload decoded from it, walked under
+    *budget* (a fresh DecodeBudget when omitted).
 
-    if seen_texts is None:
-        seen_texts = set()
+    *seen_texts* is deprecated: the budget now recognizes repeated payloads
+    itself.  When passed, *text* is still skipped if already in the set and
+    added to it, as before."""
+    if seen_texts is not None:
+        warnings.warn("recursive_scan(seen_texts=...) is deprecated; pass budget=DecodeBudget()",
+                      DeprecationWarning, stacklevel=2)
+        if text in seen_texts:
+            return []
+        seen_texts.add(text)
 
-    if depth > MAX_DEPTH or text in seen_texts:
-        return []
+    if budget is None:
+        budget = DecodeBudget()
+        budget.new_payload(text.encode("utf-8", "surrogatepass"))
 
-    seen_texts.add(text)
     findings = []
 
-    result = aho.detect(text)
-    if result["detected"]:
-        findings.append({
-            "type": "direct",
-            "decoded": text,
-            "aho_matches": result["matches"]
-        })
-
-    for candidate in HEX_PATTERN.findall(text):
-        decoded = decode_hex(candidate)
-        if decoded and decoded not in seen_texts:
+    if depth == 0:
+        # the message reuses the scan's views; the other layers see it too
+        result = aho.detect(text, ctx)
+        if result["detected"]:
             findings.append({
-                "type": "hex",
-                "decoded": decoded
+                "type": "direct",
+                "decoded": text,
+                "aho_matches": result["matches"]
             })
-            findings += recursive_scan(decoded, depth + 1, seen_texts)
-
-    for candidate in BASE64_PATTERN.findall(text):
-        decoded = decode_base64(candidate)
-        if decoded and decoded not in seen_texts:
+    else:
+        layers = _rescan(text, ctx)
+        if layers:
             findings.append({
-                "type": "base64",
-                "decoded": decoded
+                "type": "direct",
+                "decoded": text,
+                "aho_matches": layers.get("aho", ()),
+                "layers": layers
             })
-            findings += recursive_scan(decoded, depth + 1, seen_texts)
 
-    url_decoded = unquote(text)
-    if url_decoded != text and url_decoded not in seen_texts:
+    def expand(kind: str, decoded: str) -> None:
         findings.append({
-            "type": "url_encoded",
-            "decoded": url_decoded
+            "type": kind,
+            "decoded": decoded
         })
-        findings += recursive_scan(url_decoded, depth + 1, seen_texts)
+        if depth + 1 <= MAX_DEPTH:
+            findings.extend(recursive_scan(decoded, depth + 1, ctx=ctx, budget=budget))
 
-    return findings
+    for candidate in HEX_PATTERN.findall(text):
+        decoded = budget.decode("hex", candidate)
+        if decoded:
+            expand("hex", decoded)
+
+    for candidate in BASE64_PATTERN.findall(text):
+        decoded = budget.decode("base64", candidate)
+        if decoded:
+            expand("base64", decoded)
+
+    url_decoded = budget.unquote(text)
+    if url_decoded:
+        expand("url_encoded", url_decoded)
 
-def detect(text: str) -> dict:
-    findings = recursive_scan(text)
+    return findings
 
-    return {
-        "detected": len(findings) > 0,
-        "findings": findings,
-        "severity": "critical" if findings else "none",
-        "layer": "encoding_decoder"
-    }
+def detect(text: str, ctx: Optional[ScanContext] = None) -> LayerResult:
+    budget = DecodeBudget()
+    budget.new_payload(text.encode("utf-8", "surrogatepass"))
+    findings = recursive_scan(text, budget=budget, ctx=ctx)
 
+    extra = {"budget_exhausted": True} if budget.exhausted else None
+    if not findings:
+        if extra:
+            return LayerResult("encoding_decoder", (), "none", extra=extra)
+        return LayerResult.clean("encoding_decoder")
+    return LayerResult("encoding_decoder", tuple(findings), "critical", extra=extra)
@@ -0,0 +1,130 @@
+"""
+anticipator.detection.core.engine
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+Unified phrase engine — one Aho-Corasick automaton over every phrase-based
+signature list, walked once per message.
+
+Each automaton value carries the matched phrase plus one payload per list
+it came from: (layer, category, signature id).  match() distributes hits
+by layer, so aho, threat_categories, homoglyph and path_traversal each
+consume their own slice of a single pass over the normalized text.
+
+The automaton is loaded lazily on first use, from the signature bundle
+(see core.bundle) — the extended layers import this module, so their lists
+cannot be read at import time.
+"""
+
+import logging
+import re
+import threading
+from typing import NamedTuple
+
+import ahocorasick
+
+from anticipator.detection.core.normalizer import normalize
+
+log = logging.getLogger(__name__)
+
+
+class Hit(NamedTuple):
+    category: str
+    sig_id: int
+    phrase: str
+    start: int
+    end: int
+
+
+# Escaped punctuation and plain characters only — no classes, groups,
+# quantifiers or anchors.
+_LITERAL_RE = re.compile(r'^(?:[^\\.^$*+?{}\[\]|()]|\\[^A-Za-z0-9])+$')
+_UNESCAPE   = re.compile(r'\\(.)')
+
+
+def literal_of(pattern: str):
+    """Return the literal string a regex source matches, or None if the
+    pattern uses any regex syntax beyond escaped punctuation."""
+    if not _LITERAL_RE.match(pattern):
+        return None
+    return _UNESCAPE.sub(r'\1', pattern)
+
+
+def _sources():
+    """Yield (layer, category, phrases) for every phrase-based list."""
+    from anticipator.detection.signatures import DIRECT_PHRASES, OBJECTS, VERBS
+    from anticipator.detection.extended import homoglyph, path_traversal, threat_categories
+
+    yield "aho", "direct", DIRECT_PHRASES
+    yield "aho", "verb",   VERBS
+    yield "aho", "object", OBJECTS
+
+    yield "threat_categories", "data_exfiltration",    threat_categories.DATA_EXFILTRATION_PHRASES
+    yield "threat_categories", "privilege_escalation", threat_categories.PRIVILEGE_ESCALATION_PHRASES
+    yield "threat_categories", "social_engineering",   threat_categories.SOCIAL_ENGINEERING_PHRASES
+    yield "threat_categories", "emotional_pressure",   threat_categories.EMOTIONAL_PRESSURE_PHRASES
+
+    yield "homoglyph", "keyword", homoglyph.SUSPICIOUS_KEYWORDS
+
+    yield "path_traversal", "forbidden_path", [
+        literal_of(p.regex.pattern) or "" for p in path_traversal._FORBIDDEN_PATTERNS
+    ]
+
+
+def _build() -> ahocorasick.Automaton:
+    payloads: dict[str, list[tuple[str, str, int]]] = {}
+    for layer, category, phrases in _sources():
+        for i, raw in enumerate(phrases):
+            w = normalize(raw)
+            if not w:
+                continue
+            entries = payloads.setdefault(w, [])
+            # keep the first signature id per (layer, category)
+            if not any(e[0] == layer and e[1] == category for e in entries):
+                entries.append((layer, category, i))
+
+    A = ahocorasick.Automaton()
+    for w, entries in payloads.items():
+        A.add_word(w, (w, tuple(entries)))
+    A.make_automaton()
+    return A
+
+
+_automaton = None
+_longest = 0
+_build_lock = threading.Lock()
+
+
+def automaton() -> ahocorasick.Automaton:
+    global _automaton
+    if _automaton is None:
+        with _build_lock:
+            if _automaton is None:
+                from anticipator.detection.core import bundle
+                _automaton = bundle.load()["phrases"]
+                log.debug("[ANTICIPATOR] Detection engine ready.")
+    return _automaton
+
+
+def longest_phrase() -> int:
+    """Length of the longest phrase in the automaton."""
+    global _longest
+    if not _longest:
+        _longest = max(len(w) for w in automaton().keys())
+    return _longest
+
+
+def match(normalized: str) -> dict[str, list[Hit]]:
+    """Walk *normalized* once and return hits grouped by layer.
+
+    Hits within each layer are ordered by end position, as reported by
+    the automaton."""
+    hits: dict[str, list[Hit]] = {}
+    if not normalized:
+        return hits
+    for end, (phrase, entries) in automaton().iter(normalized):
+        start = end - len(phrase) + 1
+        for layer, category, sig_id in entries:
+            bucket = hits.get(layer)
+            if bucket is None:
+                bucket = hits[layer] = []
+            bucket.append(Hit(category, sig_id, phrase, start, end))
+    return hits
@@ -1,56 +1,149 @@
 import re
 import math
-from typing import List
+from collections import Counter
+from typing import List, Optional, Tuple
+from . import batchstats
+from .context import ScanContext
+from .prefilter import LiteralPrefilter
+from .result import LayerResult
 from ..signatures import CREDENTIAL_PATTERNS
 
 ENTROPY_THRESHOLD = 4.2
 LENGTH_THRESHOLD = 20
 
+# Tokens that pass the whole-token check are also searched for their most
+# random ENTROPY_WINDOW characters, so a key inside a long low-entropy token
+# (prefix_<key>_suffix) is not diluted away.  No 32-char window of a benign
+# token below ENTROPY_THRESHOLD was seen above 4.4 in calibration.
+ENTROPY_WINDOW = 32
+WINDOW_ENTROPY_THRESHOLD = 4.4
+
+# messages with at least this many tokens get their entropies from the
+# NumPy batch path (see core.batchstats) when it is available
+BATCH_MIN_TOKENS = 32
+
+_TOKEN_PATTERN = re.compile(r'[A-Za-z0-9+/=_\-\.]{20,}')
+
+# Each credential regex is gated on its required literal (AKIA, ghp_, xox…);
+# only patterns whose anchor occurs in the message are compiled and run.
+# The anchor index comes prebuilt in the signature bundle.
+_CREDENTIAL_PREFILTER = LiteralPrefilter(CREDENTIAL_PATTERNS, re.IGNORECASE,
+                                         bundle_key="credentials")
+
 def shannon_entropy(text: str) -> float:
-    if not text:
+    n = len(text)
+    if not n:
         return 0.0
-    freq = {}
-    for char in text:
-        freq[char] = freq.get(char, 0) + 1
-    entropy = 0.0
-    for count in freq.values():
-        prob = count / len(text)
-        entropy -= prob * math.log2(prob)
-    return entropy
-
-def find_high_entropy_strings(text: str) -> List[dict]:
+    # H = log2(n) - Σ c·log2(c) / n, over the character counts c
+    return math.log2(n) - sum([c * math.log2(c) for c in Counter(text).values()]) / n
+
+
+def _gains(width: int) -> List[float]:
+    """gains[c] = (c+1)·log2(c+1) - c·log2(c): how much Σ c·log2(c) grows
+    when a count rises from c."""
+    return [(c + 1) * math.log2(c + 1) - (c * math.log2(c) if c else 0.0)
+            for c in range(width)]
+
+
+_GAINS = _gains(ENTROPY_WINDOW)
+
+
+def max_window_entropy(token: str, width: int = ENTROPY_WINDOW) -> Tuple[float, int]:
+    """Return (entropy, start) of the highest-entropy *width*-character
+    window of *token*, in one pass: each slide changes two counts, and the
+    window's Σ c·log2(c) is updated from them instead of recounted."""
+    if len(token) <= width:
+        return shannon_entropy(token), 0
+    gains = _GAINS if width == ENTROPY_WINDOW else _gains(width)
+
+    counts = dict.fromkeys(token, 0)
+    total = 0.0
+    for ch in token[:width]:
+        c = counts[ch]
+        total += gains[c]
+        counts[ch] = c + 1
+
+    # the highest entropy window has the lowest Σ c·log2(c)
+    lowest, best = total, 0
+    for start, (out, new) in enumerate(zip(token, token[width:]), 1):
+        if out == new:
+            continue
+        c = counts[out] - 1
+        counts[out] = c
+        total -= gains[c]
+        c = counts[new]
+        counts[new] = c + 1
+        total += gains[c]
+        if total < lowest:
+            lowest, best = total, start
+    return shannon_entropy(token[best:best + width]), best
+
+def candidate_tokens(text: str) -> List[str]:
+    """Candidate secret tokens — runs of 20+ base64/URL-safe characters."""
+    return _TOKEN_PATTERN.findall(text)
+
+def token_entropies(tokens: List[str]) -> List[float]:
+    if len(tokens) >= BATCH_MIN_TOKENS and batchstats.available():
+        return batchstats.token_entropies([tokens])[0]
+    return [shannon_entropy(token) for token in tokens]
+
+def token_finding(token: str, entropy: float) -> Optional[dict]:
+    """The high-entropy finding for *token*, if it has one: the whole
+    token, or else its most random window."""
+    if entropy > ENTROPY_THRESHOLD and len(token) >= LENGTH_THRESHOLD:
+        return {
+            "type": "high_entropy",
+            "value": token[:10] + "...",
+            "entropy": round(entropy, 3),
+            "length": len(token)
+        }
+    if len(token) > ENTROPY_WINDOW:
+        window_entropy, start = max_window_entropy(token)
+        if window_entropy > WINDOW_ENTROPY_THRESHOLD:
+            return {
+                "type": "high_entropy_window",
+                "value": token[start:start + 10] + "...",
+                "entropy": round(window_entropy, 3),
+                "length": len(token),
+                "offset": start
+            }
+    return None
+
+def find_high_entropy_strings(text: str, tokens: Optional[List[str]] = None,
+                              entropies: Optional[List[float]] = None) -> List[dict]:
     findings = []
-    tokens = re.findall(r'[A-Za-z0-9+/=_\-\.]{20,}', text)
-    for token in tokens:
-        entropy = shannon_entropy(token)
-        if entropy > ENTROPY_THRESHOLD and len(token) >= LENGTH_THRESHOLD:
-            findings.append({
-                "type": "high_entropy",
-                "value": token[:10] + "...",
-                "entropy": round(entropy, 3),
-                "length": len(token)
-            })
+    if tokens is None:
+        tokens = _TOKEN_PATTERN.findall(text)
+    if entropies is None:
+        entropies = token_entropies(tokens)
+    for token, entropy in zip(tokens, entropies):
+        finding = token_finding(token, entropy)
+        if finding:
+            findings.append(finding)
     return findings
 
-def find_credential_patterns(text: str) -> List[dict]:
+def find_credential_patterns(text: str, lower: Optional[str] = None) -> List[dict]:
     findings = []
-    for pattern, label in CREDENTIAL_PATTERNS:
-        matches = re.findall(pattern, text, re.IGNORECASE)
-        for match in matches:
+    for idx, count in _CREDENTIAL_PREFILTER.counts(text, lower):
+        label = CREDENTIAL_PATTERNS[idx][1]
+        for _ in range(count):
             findings.append({
                 "type": label,
                 "severity": "critical"
             })
     return findings
 
-def detect(text: str) -> dict:
-    entropy_findings = find_high_entropy_strings(text)
-    regex_findings = find_credential_patterns(text)
+def detect(text: str, ctx: Optional[ScanContext] = None) -> LayerResult:
+    if ctx is None:
+        ctx = ScanContext(text)
+    # tokens and entropies may be pre-seeded by scan_batch()
+    found = ctx.view("entropy_tokens", candidate_tokens, text)
+    entropies = ctx.view("token_entropy", token_entropies, found)
+    entropy_findings = find_high_entropy_strings(text, found, entropies)
+    regex_findings = find_credential_patterns(text, ctx.lower)
     all_findings = entropy_findings + regex_findings
 
-    return {
-        "detected": len(all_findings) > 0,
-        "findings": all_findings,
-        "severity": "critical" if regex_findings else ("warning" if entropy_findings else "none"),
-        "layer": "entropy_credential"
-    }
\ No newline at end of file
+    if not all_findings:
+        return LayerResult.clean("entropy_credential")
+    return LayerResult("entropy_credential", tuple(all_findings),
+                       "critical" if regex_findings else "warning")
\ No newline at end of file
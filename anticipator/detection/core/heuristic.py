@@ -1,56 +1,50 @@
 import re
-import string
+from typing import Optional
 
-_CHAR_SPACING = re.compile(r'(\b\w\s){6,}')
+from anticipator.detection.core.charstats import CharStats
+from anticipator.detection.core.context import ScanContext
+from anticipator.detection.core.result import LayerResult
 
-_CHAR_REPETITION = re.compile(r'(.)\1{6,}')
+# only presence matters: the fixed-length forms find the same texts as
+# (\b\w\s){6,} and (.)\1{6,}, with less backtracking
+_CHAR_SPACING = re.compile(r'(?<!\w)\w\s(?:\w\s){5}')
+
+_CHAR_REPETITION = re.compile(r'(.)\1\1\1\1\1\1')
 
 _URL_LIKE = re.compile(r'https?://', re.IGNORECASE)
 
 _BASE64_LIKE = re.compile(r'^[A-Za-z0-9+/=]{40,}$')
 
-_ASCII_LETTER = re.compile(r'[A-Za-z]')
-_NONASCII_LETTER = re.compile(r'[^\x00-\x7F]')
-
-_PUNCTUATION_SET = set(string.punctuation)
-
-_ZERO_WIDTH = re.compile(r'[\u200b\u200c\u200d\u2060\ufeff]')
-
-_CONSTANT_LIKE = re.compile(r'^[A-Z][A-Z0-9_]{2,}$')
 
-
-def _is_all_caps_suspicious(text: str) -> bool:
-    if len(text) <= 50:
+def _is_all_caps_suspicious(stats: CharStats) -> bool:
+    if stats.length <= 50:
         return False
 
-    tokens = text.split()
-    if all(_CONSTANT_LIKE.match(t) for t in tokens if t):
+    if stats.all_constants:
         return False
-    return text.upper() == text and any(c.isalpha() for c in text)
+    return stats.no_lowercase and stats.has_alpha
 
 
-def _has_mixed_script_words(text: str) -> bool:
-    for word in text.split():
-        if len(word) < 4:
+def _long_token(stats: CharStats) -> int:
+    for word in stats.long_tokens:
+        if _URL_LIKE.match(word) or _BASE64_LIKE.match(word):
             continue
-        if _ASCII_LETTER.search(word) and _NONASCII_LETTER.search(word):
-            return True
-    return False
+        return len(word)
+    return 0
 
 
-def _excessive_punctuation(text: str) -> bool:
-    if len(text) < 20:
+def _excessive_punctuation(stats: CharStats) -> bool:
+    if stats.length < 20:
         return False
-    punct_count = sum(1 for c in text if c in _PUNCTUATION_SET)
-    return (punct_count / len(text)) > 0.35
-
-
-def _has_zero_width(text: str) -> bool:
-    return bool(_ZERO_WIDTH.search(text))
+    return (stats.punctuation / stats.length) > 0.35
 
 
-def detect(text: str) -> dict:
+def detect(text: str, ctx: Optional[ScanContext] = None) -> LayerResult:
     findings = []
+    if ctx is None:
+        ctx = ScanContext(text)
+    # every rule below except the two pattern searches reads this one record
+    stats = ctx.char_stats
 
     if _CHAR_SPACING.search(text):
         findings.append({"type": "char_spacing", "severity": "warning"})
@@ -58,29 +52,23 @@ def detect(text: str) -> dict:
     if _CHAR_REPETITION.search(text):
         findings.append({"type": "char_repetition", "severity": "warning"})
 
-    if _is_all_caps_suspicious(text):
+    if _is_all_caps_suspicious(stats):
         findings.append({"type": "all_caps_block", "severity": "warning"})
 
-    for word in text.split():
-        if len(word) > 60:
-            if _URL_LIKE.match(word) or _BASE64_LIKE.match(word):
-                continue   
-            findings.append({"type": "long_token", "severity": "warning",
-                              "length": len(word)})
-            break   
+    long_token = _long_token(stats)
+    if long_token:
+        findings.append({"type": "long_token", "severity": "warning",
+                          "length": long_token})
 
-    if _has_mixed_script_words(text):
+    if stats.mixed_script:
         findings.append({"type": "mixed_script_word", "severity": "warning"})
 
-    if _excessive_punctuation(text):
+    if _excessive_punctuation(stats):
         findings.append({"type": "excessive_punctuation", "severity": "warning"})
 
-    if _has_zero_width(text):
+    if stats.zero_width:
         findings.append({"type": "zero_width_chars", "severity": "warning"})
 
-    return {
-        "detected": len(findings) > 0,
-        "findings": findings,
-        "severity": "warning" if findings else "none",
-        "layer": "heuristic",
-    }
\ No newline at end of file
+    if not findings:
+        return LayerResult.clean("heuristic")
+    return LayerResult("heuristic", tuple(findings), "warning")
@@ -0,0 +1,356 @@
+"""
+anticipator.detection.core.prefilter
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+Literal-anchored prefilter for large regex lists.
+
+Almost every signature regex has a literal it cannot match without
+(``AKIA``, ``ghp_``, ``xox``, ``AZURE_CLIENT_SECRET``, ``process.env.``).
+LiteralPrefilter extracts that literal from each pattern, indexes all of
+them in one Aho-Corasick automaton, and on each message only confirms the
+regexes whose anchor actually occurs:
+
+  - prefix anchors (the pattern starts with the literal) are confirmed
+    with rx.match() at each anchor offset
+  - anchors further into the pattern fall back to a full findall()
+  - patterns with no usable literal go to a small always-run bucket
+
+Anchors are matched case-insensitively against fold_case(text), so
+patterns are expected to be compiled with re.IGNORECASE.  Literals with
+non-ASCII characters are not used as anchors: IGNORECASE equates some of
+them (µ and μ) in ways no cheap fold reproduces.
+
+The anchor index (build_index()) is plain data and can be shipped in the
+signature bundle (see core.bundle); regexes are compiled on demand.
+"""
+
+import re
+import string
+import threading
+from typing import List, Optional, Tuple
+
+import ahocorasick
+
+_QUANTIFIER = re.compile(r'(?:[*+?]|\{(\d*)(?:,(\d*))?\})[?+]?')
+_INLINE_FLAGS = re.compile(r'^\(\?[aiLmsux]+\)')
+_ZERO_WIDTH_ESCAPES = set("bBAZ")
+
+# the non-ASCII characters IGNORECASE equates with ASCII letters — İ and ı
+# with i, ſ with s, K with k — which lower() does not map to them
+_CASE_VARIANTS = re.compile('[\u0130\u0131\u017f\u212a]')
+_FOLD = str.maketrans(string.ascii_uppercase + "\u0130\u0131\u017f\u212a",
+                      string.ascii_lowercase + "iisk")
+
+
+def fold_case(text: str, lower: Optional[str] = None) -> str:
+    """Lowercase *text* so that an ASCII literal occurs in the result
+    wherever an IGNORECASE regex for it would match; same length as *text*.
+    Pass *lower* when text.lower() is already at hand."""
+    if _CASE_VARIANTS.search(text):
+        return text.translate(_FOLD).lower()
+    return text.lower() if lower is None else lower
+
+
+def _skip_class(pattern: str, i: int) -> int:
+    """Return the index just past the character class starting at pattern[i]."""
+    i += 1
+    if i < len(pattern) and pattern[i] == '^':
+        i += 1
+    if i < len(pattern) and pattern[i] == ']':
+        i += 1
+    while i < len(pattern) and pattern[i] != ']':
+        i += 2 if pattern[i] == '\\' else 1
+    return i + 1
+
+
+def _skip_group(pattern: str, i: int) -> int:
+    """Return the index just past the group starting at pattern[i]."""
+    depth = 0
+    while i < len(pattern):
+        c = pattern[i]
+        if c == '\\':
+            i += 2
+            continue
+        if c == '[':
+            i = _skip_class(pattern, i)
+            continue
+        if c == '(':
+            depth += 1
+        elif c == ')':
+            depth -= 1
+            if depth == 0:
+                return i + 1
+        i += 1
+    return i
+
+
+def _atoms(pattern: str):
+    """Yield (kind, value, min_repeat, quantified) for each top-level atom.
+
+    kind is "literal" (value = the character), "group" (value = the group
+    body), "zero" for zero-width assertions, "alt" for a top-level "|",
+    or "other" for anything else that consumes input.
+    """
+    m = _INLINE_FLAGS.match(pattern)
+    i = m.end() if m else 0
+
+    while i < len(pattern):
+        c = pattern[i]
+        kind, value = "other", None
+
+        if c == '|':
+            yield "alt", None, 1, False
+            i += 1
+            continue
+        if c == '\\':
+            nxt = pattern[i + 1:i + 2]
+            if nxt.isalnum():
+                if nxt in _ZERO_WIDTH_ESCAPES:
+                    kind = "zero"
+            else:
+                kind, value = "literal", nxt
+            i += 2
+        elif c == '[':
+            i = _skip_class(pattern, i)
+        elif c == '(':
+            end = _skip_group(pattern, i)
+            if pattern.startswith(('(?=', '(?!', '(?<=', '(?<!'), i):
+                kind = "zero"
+            elif pattern.startswith('(?:', i):
+                kind, value = "group", pattern[i + 3:end - 1]
+            elif not pattern.startswith('(?', i):
+                kind, value = "group", pattern[i + 1:end - 1]
+            i = end
+        elif c in '^$':
+            kind = "zero"
+            i += 1
+        elif c == '.':
+            i += 1
+        else:
+            kind, value = "literal", c
+            i += 1
+
+        q = _QUANTIFIER.match(pattern, i)
+        min_repeat = 1
+        if q:
+            i = q.end()
+            if q.group(0)[0] in '*?':
+                min_repeat = 0
+            elif q.group(0)[0] == '{':
+                min_repeat = int(q.group(1) or 0)
+        yield kind, value, min_repeat, bool(q)
+
+
+def _literal_runs(pattern: str):
+    """Return ([(run, is_prefix)], [alternatives...]) for *pattern*, or None
+    if it has top-level alternation."""
+    runs: list[tuple[str, bool]] = []
+    groups: list[list[str]] = []
+    run: list[str] = []
+    run_is_prefix = True      # no consuming atom seen before the current run
+    seen_consuming = False
+
+    for kind, value, min_repeat, quantified in _atoms(pattern):
+        if kind == "alt":
+            return None
+        if kind == "zero":
+            continue
+        if kind == "literal" and min_repeat > 0:
+            if not run:
+                run_is_prefix = not seen_consuming
+            run.append(value)
+            if quantified:
+                runs.append(("".join(run), run_is_prefix))
+                run = []
+        else:
+            if run:
+                runs.append(("".join(run), run_is_prefix))
+                run = []
+            if kind == "group" and min_repeat > 0:
+                alternatives = _pure_alternatives(value)
+                if alternatives:
+                    groups.append(alternatives)
+        seen_consuming = True
+    if run:
+        runs.append(("".join(run), run_is_prefix))
+    return runs, groups
+
+
+def _pure_alternatives(body: str):
+    """Return the literals of a group body like 'a|bc|d', or None if any
+    branch uses regex syntax."""
+    branches: list[list[str]] = [[]]
+    for kind, value, min_repeat, quantified in _atoms(body):
+        if kind == "alt":
+            branches.append([])
+        elif kind == "literal" and min_repeat == 1 and not quantified:
+            branches[-1].append(value)
+        else:
+            return None
+    literals = ["".join(b) for b in branches]
+    return literals if all(literals) else None
+
+
+def required_literal(pattern: str) -> Tuple[Optional[str], bool]:
+    """Return (literal, is_prefix) for the best literal *pattern* requires.
+
+    Only top-level, unquantified literal runs count.  is_prefix is True when
+    the literal starts the match (nothing but zero-width assertions before
+    it).  Patterns with top-level alternation return (None, False).
+    """
+    parsed = _literal_runs(pattern)
+    if not parsed or not parsed[0]:
+        return None, False
+    runs = parsed[0]
+    first, first_is_prefix = runs[0]
+    longest = max(runs, key=lambda r: len(r[0]))
+    if first_is_prefix and len(first) >= 2:
+        return first, True
+    return longest[0], False
+
+
+def required_literals(pattern: str) -> Optional[List[str]]:
+    """Return literals at least one of which must occur for *pattern* to
+    match — its longest required run, or the branches of a mandatory group
+    of plain alternatives such as (?:weather|recipe|poem).  The option whose
+    shortest literal is longest wins.  None if there is neither."""
+    parsed = _literal_runs(pattern)
+    if not parsed:
+        return None
+    runs, groups = parsed
+    options = [[run] for run, _ in runs] + groups
+    if not options:
+        return None
+    return max(options, key=lambda lits: min(len(x) for x in lits))
+
+
+def build_index(patterns: List[Tuple[str, str]],
+                min_literal: int = 2) -> Tuple[ahocorasick.Automaton, Tuple[int, ...]]:
+    """Return (anchor automaton, always-run indices) for *patterns* — the
+    picklable part of a LiteralPrefilter."""
+    always: list[int] = []
+    anchors: dict[str, list[tuple[int, bool]]] = {}
+    for idx, (pattern, _) in enumerate(patterns):
+        literal, is_prefix = required_literal(pattern)
+        if literal is None or len(literal) < min_literal or not literal.isascii():
+            always.append(idx)
+            continue
+        anchors.setdefault(literal.lower(), []).append((idx, is_prefix))
+
+    automaton = ahocorasick.Automaton()
+    for literal, entries in anchors.items():
+        automaton.add_word(literal, (len(literal), tuple(entries)))
+    automaton.make_automaton()
+    return automaton, tuple(always)
+
+
+class LiteralPrefilter:
+    """Gate a list of (pattern, label) regexes on their required literals.
+
+    Nothing is built up front: the anchor index is taken from the
+    signature bundle entry *bundle_key* (or built) on the first scan, and
+    each regex is compiled the first time its anchor occurs."""
+
+    def __init__(self, patterns: List[Tuple[str, str]],
+                 flags: int = re.IGNORECASE, min_literal: int = 2,
+                 bundle_key: Optional[str] = None):
+        self.patterns = list(patterns)
+        self.flags = flags
+        self.min_literal = min_literal
+        self.bundle_key = bundle_key
+        self._rx: list[Optional[re.Pattern]] = [None] * len(self.patterns)
+        self._index = None
+        self._lock = threading.Lock()
+
+    @property
+    def compiled(self) -> List[Tuple[re.Pattern, str]]:
+        """Every (regex, label), compiling whatever is not compiled yet."""
+        return [(self._regex(idx), label) for idx, (_, label) in enumerate(self.patterns)]
+
+    @property
+    def always(self) -> Tuple[int, ...]:
+        return self._anchor_index()[1]
+
+    def _regex(self, idx: int) -> re.Pattern:
+        rx = self._rx[idx]
+        if rx is None:
+            rx = self._rx[idx] = re.compile(self.patterns[idx][0], self.flags)
+        return rx
+
+    def _anchor_index(self):
+        if self._index is None:
+            with self._lock:
+                if self._index is None:
+                    if self.bundle_key is not None:
+                        from anticipator.detection.core import bundle
+                        self._index = bundle.load()[self.bundle_key]
+                    else:
+                        self._index = build_index(self.patterns, self.min_literal)
+        return self._index
+
+    def _anchors(self, text: str, lower: Optional[str]):
+        """Return ({index: [prefix anchor offsets]}, {indices to search
+        in full}) for the anchors occurring in *text*."""
+        lower = fold_case(text, lower)
+        # anchor offsets are only trusted when *lower* lines up with *text*
+        offsets_ok = len(lower) == len(text)
+
+        prefix_hits: dict[int, list[int]] = {}
+        anywhere: set[int] = set()
+        for end, (length, entries) in self._anchor_index()[0].iter(lower):
+            start = end - length + 1
+            for idx, is_prefix in entries:
+                if is_prefix and offsets_ok:
+                    prefix_hits.setdefault(idx, []).append(start)
+                else:
+                    anywhere.add(idx)
+        return prefix_hits, anywhere
+
+    def counts(self, text: str, lower: Optional[str] = None) -> List[Tuple[int, int]]:
+        """Return [(pattern index, match count)] in pattern order, counting
+        non-overlapping matches exactly as re.findall() would."""
+        prefix_hits, anywhere = self._anchors(text, lower)
+
+        result: dict[int, int] = {}
+        for idx, starts in prefix_hits.items():
+            rx = self._regex(idx)
+            count, next_pos = 0, 0
+            for pos in starts:
+                if pos < next_pos:
+                    continue
+                m = rx.match(text, pos)
+                if m:
+                    count += 1
+                    next_pos = max(m.end(), pos + 1)
+            if count:
+                result[idx] = count
+
+        for idx in anywhere.union(self.always):
+            count = len(self._regex(idx).findall(text))
+            if count:
+                result[idx] = count
+
+        return sorted(result.items())
+
+    def finditer(self, text: str, lower: Optional[str] = None) -> List[Tuple[int, "re.Match"]]:
+        """Return [(pattern index, match)] for every non-overlapping match,
+        ordered by pattern index and then position — the positional form
+        of counts()."""
+        prefix_hits, anywhere = self._anchors(text, lower)
+
+        result: list[tuple[int, re.Match]] = []
+        for idx, starts in prefix_hits.items():
+            rx = self._regex(idx)
+            next_pos = 0
+            for pos in starts:
+                if pos < next_pos:
+                    continue
+                m = rx.match(text, pos)
+                if m:
+                    result.append((idx, m))
+                    next_pos = max(m.end(), pos + 1)
+
+        for idx in anywhere.union(self.always):
+            result.extend((idx, m) for m in self._regex(idx).finditer(text))
+
+        result.sort(key=lambda item: (item[0], item[1].start()))
+        return result
@@ -0,0 +1,157 @@
+"""
+anticipator.detection.core.regexset
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+RegexSet — evaluate a list of (regex, label) pairs in one pass and report
+every label that matched.
+
+Two tiers, chosen per pattern at build time:
+
+  - literal-gated: patterns with required literals (see
+    prefilter.required_literals) are only searched when one of them occurs
+    in the text; all literals are found in one Aho-Corasick pass over
+    prefilter.fold_case(text).  Only ASCII literals gate.
+  - merged: the rest are joined into one alternation of named groups;
+    a single search() over it proves none of them match on clean text
+
+Patterns using backreferences or named groups cannot be renumbered inside
+an alternation and are always searched on their own.
+
+matches() returns, per matching pattern, exactly the match its own
+pattern.search(text) would — callers keep the per-pattern semantics of
+the loops they replace.
+"""
+
+import re
+from typing import Iterable, List, Optional, Tuple, Union
+
+import ahocorasick
+
+from anticipator.detection.core.prefilter import fold_case, required_literals
+
+_SCOPED_FLAGS = (
+    (re.IGNORECASE, "i"),
+    (re.MULTILINE,  "m"),
+    (re.DOTALL,     "s"),
+    (re.VERBOSE,    "x"),
+)
+_LEADING_FLAGS = re.compile(r'^\(\?([aiLmsux]+)\)')
+_BACKREF_OR_NAMED = re.compile(r'(?<!\\)(?:\\\\)*(?:\\[1-9]|\(\?P[<=])')
+
+
+def _scoped(rx: re.Pattern) -> Optional[str]:
+    """Rewrite rx as a source fragment with its flags scoped to a group, or
+    None if it cannot be embedded in a larger alternation."""
+    source = rx.pattern
+    if not isinstance(source, str) or _BACKREF_OR_NAMED.search(source):
+        return None
+    m = _LEADING_FLAGS.match(source)
+    if m:
+        if set(m.group(1)) - set("imsxu"):
+            return None
+        source = source[m.end():]
+    letters = "".join(ch for flag, ch in _SCOPED_FLAGS if rx.flags & flag)
+    return f"(?{letters}:{source})" if letters else f"(?:{source})"
+
+
+class RegexSet:
+    """A list of (regex, label) pairs searched as one set."""
+
+    def __init__(self, entries: Iterable[Tuple[Union[str, re.Pattern], str]],
+                 flags: int = 0, min_literal: int = 2):
+        self.patterns: list[re.Pattern] = []
+        self.labels: list[str] = []
+        for rx, label in entries:
+            if isinstance(rx, str):
+                rx = re.compile(rx, flags)
+            self.patterns.append(rx)
+            self.labels.append(label)
+
+        gated: dict[str, list[int]] = {}
+        self._solo: list[int] = []
+        merged: list[str] = []
+        self._merged_ids: list[int] = []
+
+        for idx, rx in enumerate(self.patterns):
+            literals = None
+            if not rx.flags & re.VERBOSE:
+                literals = required_literals(rx.pattern)
+            if (literals and min(len(x) for x in literals) >= min_literal
+                    and all(x.isascii() for x in literals)):
+                # the gate runs on case-folded text; case-sensitive patterns
+                # are simply confirmed by their own search
+                for literal in literals:
+                    gated.setdefault(literal.lower(), []).append(idx)
+                continue
+            fragment = _scoped(rx)
+            if fragment is None:
+                self._solo.append(idx)
+            else:
+                merged.append(f"(?P<g{idx}>{fragment})")
+                self._merged_ids.append(idx)
+
+        self._merged = re.compile("|".join(merged)) if merged else None
+
+        self._gate = None
+        if gated:
+            self._gate = ahocorasick.Automaton()
+            for literal, ids in gated.items():
+                self._gate.add_word(literal, tuple(ids))
+            self._gate.make_automaton()
+
+    def __len__(self) -> int:
+        return len(self.patterns)
+
+    def _candidates(self, text: str, lower: Optional[str]) -> set:
+        """Indices of gated patterns whose literal occurs in *text*."""
+        candidates: set[int] = set()
+        if self._gate is not None and text:
+            for _, ids in self._gate.iter(fold_case(text, lower)):
+                candidates.update(ids)
+        return candidates
+
+    def matches(self, text: str, lower: Optional[str] = None) -> List[Tuple[int, re.Match]]:
+        """Return [(index, first match)] for every pattern that matches,
+        in list order.  Pass *lower* when text.lower() is already at hand."""
+        found: dict[int, re.Match] = {}
+
+        for idx in self._candidates(text, lower):
+            m = self.patterns[idx].search(text)
+            if m:
+                found[idx] = m
+
+        if self._merged is not None:
+            m = self._merged.search(text)
+            if m:
+                # nothing in the merged tier matches before m.start(), so
+                # the remaining members only need searching from there
+                first = int(m.lastgroup[1:])
+                found[first] = self.patterns[first].match(text, m.start())
+                for idx in self._merged_ids:
+                    if idx != first:
+                        mm = self.patterns[idx].search(text, m.start())
+                        if mm:
+                            found[idx] = mm
+
+        for idx in self._solo:
+            m = self.patterns[idx].search(text)
+            if m:
+                found[idx] = m
+
+        return sorted(found.items(), key=lambda item: item[0])
+
+    def first(self, text: str, lower: Optional[str] = None) -> Optional[Tuple[int, re.Match]]:
+        """Return (index, match) for the first pattern in list order that
+        matches, or None — the set form of a loop that breaks on first hit."""
+        candidates = self._candidates(text, lower)
+        if self._merged is not None and self._merged.search(text):
+            candidates.update(self._merged_ids)
+        candidates.update(self._solo)
+        for idx in sorted(candidates):
+            m = self.patterns[idx].search(text)
+            if m:
+                return idx, m
+        return None
+
+    def labels_matched(self, text: str, lower: Optional[str] = None) -> List[str]:
+        """Return the label of every matching pattern, in list order."""
+        return [self.labels[idx] for idx, _ in self.matches(text, lower)]
@@ -0,0 +1,317 @@
+"""
+anticipator.detection.core.result
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+Slotted, read-only result types for layers and whole scans.
+
+Both are Mappings with the same keys the plain dicts used to have, so
+result["severity"], result["layers"]["aho"]["location"] and iteration keep
+working.  Subscripting "layers" yields each layer as the plain dict it used
+to be, "location" included, built on first access; the attribute
+result.layers holds the LayerResult objects themselves.
+
+They are not dicts, so json.dumps(result) raises TypeError — serialize
+result.to_dict(), the full JSON-ready dict in the old shape.
+
+A scan that could not run any layer (see scanner.scan_async) carries
+"error" — "scan_timeout" — so its detected=False never reads as clean.
+
+Findings are tuples.  Clean layers return a shared per-layer singleton from
+LayerResult.clean(), so a clean scan allocates little beyond its
+ScanResult and the layers mapping.
+"""
+
+from collections.abc import Mapping
+from typing import Any, Optional
+
+_RANK = {"critical": 4, "high": 3, "medium": 2, "warning": 1, "none": 0}
+
+
+def _rank(severity: str) -> int:
+    return _RANK.get(severity, 0)
+
+
+class LayerResult(Mapping):
+    """One layer's verdict.  *key* names the findings field ("findings",
+    or "matches" for aho_corasick); *extra* holds any further fields."""
+
+    __slots__ = ("detected", "findings", "severity", "layer", "key", "extra")
+
+    _clean: dict = {}
+
+    def __init__(self, layer: str, findings: tuple = (), severity: str = "none",
+                 detected: Optional[bool] = None, key: str = "findings",
+                 extra: Optional[dict] = None):
+        self.detected = bool(findings) if detected is None else detected
+        self.findings = findings
+        self.severity = severity
+        self.layer = layer
+        self.key = key
+        self.extra = extra
+
+    @classmethod
+    def clean(cls, layer: str, key: str = "findings") -> "LayerResult":
+        """Return the shared clean result for *layer*."""
+        result = cls._clean.get((layer, key))
+        if result is None:
+            result = cls._clean.setdefault((layer, key), cls(layer, key=key))
+        return result
+
+    @classmethod
+    def from_mapping(cls, data: Mapping) -> "LayerResult":
+        """Wrap a plain dict result (e.g. from a third-party layer)."""
+        key = "matches" if "matches" in data and "findings" not in data else "findings"
+        extra = {k: v for k, v in data.items()
+                 if k not in ("detected", "severity", "layer", key)}
+        return cls(
+            data.get("layer", ""),
+            tuple(data.get(key) or ()),
+            data.get("severity", "none"),
+            bool(data.get("detected", False)),
+            key,
+            extra or None,
+        )
+
+    # ── Mapping ───────────────────────────────────────────────────────────────
+
+    def _keys(self) -> tuple:
+        base = ("detected", self.key, "severity", "layer")
+        return base + tuple(self.extra) if self.extra else base
+
+    def __getitem__(self, name: str) -> Any:
+        if name == "detected":
+            return self.detected
+        if name == self.key:
+            return self.findings
+        if name == "severity":
+            return self.severity
+        if name == "layer":
+            return self.layer
+        if self.extra and name in self.extra:
+            return self.extra[name]
+        raise KeyError(name)
+
+    def __iter__(self):
+        return iter(self._keys())
+
+    def __len__(self) -> int:
+        return 4 + (len(self.extra) if self.extra else 0)
+
+    def __repr__(self) -> str:
+        return f"LayerResult({self.to_dict()!r})"
+
+    def to_dict(self, location: Optional[dict] = None) -> dict:
+        d = {
+            "detected": self.detected,
+            self.key:   [dict(f) if isinstance(f, Mapping) else f for f in self.findings],
+            "severity": self.severity,
+            "layer":    self.layer,
+        }
+        if self.extra:
+            d.update(self.extra)
+        if location is not None:
+            d["location"] = location
+        return d
+
+
+def _to_dict(result) -> dict:
+    if isinstance(result, dict):
+        return result
+    if hasattr(result, "__dict__"):
+        return vars(result)
+    if hasattr(result, "_asdict"):
+        return result._asdict()
+    return dict(result)
+
+
+def _sanitize(obj):
+
+    if obj is None or isinstance(obj, (bool, int, float, str)):
+        return obj
+
+    if isinstance(obj, dict):
+        return {k: _sanitize(v) for k, v in obj.items()}
+
+    if isinstance(obj, (list, tuple)):
+        return [_sanitize(item) for item in obj]
+
+    if hasattr(obj, "_asdict"):
+        return _sanitize(obj._asdict())
+
+    if hasattr(obj, "__dict__"):
+        return _sanitize(vars(obj))
+
+    return str(obj)
+
+
+def _as_layer_result(result) -> LayerResult:
+    """Built-in layers already return LayerResult; plain dicts and other
+    objects from third-party layers are sanitized and wrapped."""
+    if isinstance(result, LayerResult):
+        return result
+    return LayerResult.from_mapping(_sanitize(_to_dict(result)))
+
+
+class _LayerDicts(Mapping):
+    """result["layers"]: every layer as a plain dict with its "location",
+    converted on first access and kept."""
+
+    __slots__ = ("_result", "_dicts")
+
+    def __init__(self, result: "ScanResult"):
+        self._result = result
+        self._dicts: dict = {}
+
+    def __getitem__(self, name: str) -> Any:
+        d = self._dicts.get(name)
+        if d is None:
+            r = self._result.layers[name]
+            d = r.to_dict(self._result.location(name)) if isinstance(r, LayerResult) else r
+            self._dicts[name] = d
+        return d
+
+    def __iter__(self):
+        return iter(self._result.layers)
+
+    def __len__(self) -> int:
+        return len(self._result.layers)
+
+    def __repr__(self) -> str:
+        return repr(dict(self))
+
+
+class ScanResult(Mapping):
+    """The outcome of one scan() call."""
+
+    __slots__ = ("detected", "severity", "agent_id", "source_agent_id",
+                 "pipeline_position", "agent_type", "text", "layers",
+                 "layer_ms", "cached_layers", "mode", "skipped_layers",
+                 "cache_hit", "view_ms", "total_scan_ms",
+                 "budget_skipped_layers", "error", "_summary", "_layer_dicts")
+
+    _KEYS = ("detected", "severity", "agent_id", "source_agent_id",
+             "pipeline_position", "agent_type", "input_preview", "layers",
+             "summary", "mode", "skipped_layers", "deadline_exceeded",
+             "budget_skipped_layers", "cache_hit", "view_ms", "total_scan_ms")
+
+    def __init__(self, text: str, layers: dict, layer_ms: dict,
+                 agent_id: str, source_agent_id: Optional[str],
+                 pipeline_position: int, agent_type: str, mode: str,
+                 skipped_layers: tuple, cache_hit: bool, cached_layers,
+                 view_ms: dict, total_scan_ms: float,
+                 budget_skipped_layers: tuple = (), error: Optional[str] = None):
+        self.text = text
+        self.layers = layers
+        self.layer_ms = layer_ms
+        self.agent_id = agent_id
+        self.source_agent_id = source_agent_id
+        self.pipeline_position = pipeline_position
+        self.agent_type = agent_type
+        self.mode = mode
+        self.skipped_layers = skipped_layers
+        self.cache_hit = cache_hit
+        self.cached_layers = cached_layers
+        self.view_ms = view_ms
+        self.total_scan_ms = total_scan_ms
+        self.budget_skipped_layers = budget_skipped_layers
+        self.error = error
+        self._summary = None
+        self._layer_dicts = None
+
+        detected, severity, rank = False, "none", -1
+        for r in layers.values():
+            if r.get("detected", False):
+                detected = True
+            sev = r.get("severity", "none")
+            if _rank(sev) > rank:
+                severity, rank = sev, _rank(sev)
+        self.detected = detected
+        self.severity = severity
+
+    @property
+    def deadline_exceeded(self) -> bool:
+        return bool(self.budget_skipped_layers)
+
+    @property
+    def input_preview(self) -> str:
+        return self.text[:100]
+
+    @property
+    def summary(self) -> dict:
+        if self._summary is None:
+            summary = {"critical": 0, "high": 0, "medium": 0, "warning": 0, "total": 0}
+            for r in self.layers.values():
+                if r.get("detected"):
+                    sev = r.get("severity", "none")
+                    if sev in summary:
+                        summary[sev] += 1
+                    summary["total"] += 1
+            self._summary = summary
+        return self._summary
+
+    def location(self, layer_name: str) -> dict:
+        location = {
+            "agent_id": self.agent_id,
+            "source_agent_id": self.source_agent_id,
+            "pipeline_position": self.pipeline_position,
+            "scan_ms": round(self.layer_ms.get(layer_name, 0.0), 3),
+        }
+        if layer_name in self.cached_layers:
+            location["cached"] = True
+        return location
+
+    # ── Mapping ───────────────────────────────────────────────────────────────
+
+    def _keys(self) -> tuple:
+        return self._KEYS + ("error",) if self.error is not None else self._KEYS
+
+    def __getitem__(self, name: str) -> Any:
+        if name == "error" and self.error is not None:
+            return self.error
+        if name == "layers":
+            if self._layer_dicts is None:
+                self._layer_dicts = _LayerDicts(self)
+            return self._layer_dicts
+        if name in self._KEYS:
+            return getattr(self, name)
+        raise KeyError(name)
+
+    def __iter__(self):
+        return iter(self._keys())
+
+    def __len__(self) -> int:
+        return len(self._keys())
+
+    def __repr__(self) -> str:
+        error = f", error={self.error!r}" if self.error is not None else ""
+        return (f"ScanResult(detected={self.detected!r}, severity={self.severity!r}, "
+                f"agent_id={self.agent_id!r}, layers={list(self.layers)!r}{error})")
+
+    def to_dict(self) -> dict:
+        layers = {}
+        for name, r in self.layers.items():
+            if isinstance(r, LayerResult):
+                layers[name] = r.to_dict(self.location(name))
+            else:
+                layers[name] = dict(r)
+        d = {
+            "detected": self.detected,
+            "severity": self.severity,
+            "agent_id": self.agent_id,
+            "source_agent_id": self.source_agent_id,
+            "pipeline_position": self.pipeline_position,
+            "agent_type": self.agent_type,
+            "input_preview": self.input_preview,
+            "layers": layers,
+            "summary": dict(self.summary),
+            "mode": self.mode,
+            "skipped_layers": list(self.skipped_layers),
+            "deadline_exceeded": self.deadline_exceeded,
+            "budget_skipped_layers": list(self.budget_skipped_layers),
+            "cache_hit": self.cache_hit,
+            "view_ms": dict(self.view_ms),
+            "total_scan_ms": self.total_scan_ms,
+        }
+        if self.error is not None:
+            d["error"] = self.error
+        return d
+
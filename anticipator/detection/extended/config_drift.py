@@ -12,11 +12,31 @@ Fixes over v1
   is as dangerous as adding tools.allow)
 - _flatten: now handles list values (converts to frozenset for comparison)
 - set_baseline: thread-safe copy, doesn't hold reference to caller's dict
+
+Baselines
+---------
+Baselines are kept per agent (set_baseline(config, agent_id=...)); an
+agent without one is checked against the default baseline set without an
+agent id.  Each baseline is stored as a tree of subtree fingerprints — a
+16-byte BLAKE2b digest of the subtree's marshal serialization, which
+CPython builds in C for plain dicts, lists and scalars (repr() stands in
+for values marshal cannot encode).  detect() then:
+
+  - returns at once when the whole current config's fingerprint matches
+  - otherwise descends only into subtrees whose fingerprint differs, and
+    flattens and compares just those
+
+An equal config that serializes differently (keys in another order, a set
+iterated differently) takes the slower path to the same verdict.
 """
 
 import copy
+import hashlib
+import marshal
 import threading
-from typing import Any
+from typing import Any, NamedTuple, Optional
+
+from anticipator.detection.core.result import LayerResult
 
 IMMUTABLE_KEYS = [
     "agent_id",
@@ -42,15 +62,46 @@ INJECTION_RISK_KEYS = [
     "unsafe_mode",
 ]
 
-_baseline_config: dict = {}
+class _Node(NamedTuple):
+    digest: bytes
+    children: Optional[dict]    # key → _Node for a dict, None for a leaf
+    value: Any                  # normalized leaf value
+
+
+# agent id (None for the default) → baseline tree
+_baselines: dict = {}
 _lock = threading.Lock()
 
 
-def set_baseline(config: dict) -> None:
-    """Call once at pipeline start to register the expected config snapshot."""
-    global _baseline_config
+def _fingerprint(value: Any) -> bytes:
+    try:
+        data = b"m" + marshal.dumps(value)
+    except ValueError:
+        data = b"r" + repr(value).encode("utf-8", "surrogatepass")
+    return hashlib.blake2b(data, digest_size=16).digest()
+
+
+def _build(value: Any) -> _Node:
+    if isinstance(value, dict):
+        return _Node(_fingerprint(value), {k: _build(v) for k, v in value.items()}, None)
+    return _Node(_fingerprint(value), None, _normalize_value(value))
+
+
+def set_baseline(config: dict, agent_id: Optional[str] = None) -> None:
+    """Call once at pipeline start to register the expected config snapshot
+    — for *agent_id*, or the default for agents without their own."""
+    config = copy.deepcopy(config)
+    tree = _build(config)
+    with _lock:
+        if _flatten(config):
+            _baselines[agent_id] = tree
+        else:
+            _baselines.pop(agent_id, None)
+
+
+def clear_baseline(agent_id: Optional[str] = None) -> None:
     with _lock:
-        _baseline_config = _flatten(copy.deepcopy(config))
+        _baselines.pop(agent_id, None)
 
 
 def _normalize_value(v: Any) -> Any:
@@ -72,22 +123,65 @@ def _flatten(d: dict, prefix: str = "") -> dict:
     return result
 
 
-def detect(current_config: dict) -> dict:
+def _flatten_node(node: _Node, prefix: str, out: dict) -> None:
+    """_flatten() for a baseline subtree stored at key *prefix*."""
+    if node.children is None:
+        out[prefix] = node.value
+        return
+    for k, child in node.children.items():
+        _flatten_node(child, f"{prefix}.{k}" if prefix else k, out)
+
+
+def _flatten_value(value: Any, prefix: str, out: dict) -> None:
+    """_flatten() for a current-config subtree stored at key *prefix*."""
+    if isinstance(value, dict):
+        out.update(_flatten(value, prefix))
+    else:
+        out[prefix] = _normalize_value(value)
+
+
+def _changed(node: _Node, value: Any, prefix: str, baseline: dict, current: dict) -> None:
+    """Flatten, into *baseline* and *current*, both sides of every subtree
+    under *prefix* whose fingerprint differs; equal subtrees are skipped."""
+    if node.children is None or not isinstance(value, dict):
+        _flatten_node(node, prefix, baseline)
+        _flatten_value(value, prefix, current)
+        return
+    for k, v in value.items():
+        key = f"{prefix}.{k}" if prefix else k
+        child = node.children.get(k)
+        if child is None:
+            _flatten_value(v, key, current)
+        elif _fingerprint(v) != child.digest:
+            _changed(child, v, key, baseline, current)
+    for k, child in node.children.items():
+        if k not in value:
+            _flatten_node(child, f"{prefix}.{k}" if prefix else k, baseline)
+
+
+_NO_BASELINE = LayerResult(
+    "config_drift",
+    extra={"note": "no baseline set — call set_baseline() at pipeline start"},
+)
+
+
+def detect(current_config: dict, agent_id: Optional[str] = None) -> LayerResult:
     findings = []
 
     with _lock:
-        baseline = dict(_baseline_config)   # snapshot under lock
+        tree = _baselines.get(agent_id) or _baselines.get(None)
+
+    if tree is None:
+        return _NO_BASELINE
 
-    if not baseline:
-        return {
-            "detected": False,
-            "findings": [],
-            "severity": "none",
-            "layer": "config_drift",
-            "note": "no baseline set — call set_baseline() at pipeline start",
-        }
+    # ── 0. Nothing drifted: one fingerprint compare ──────────────────────────
+    if _fingerprint(current_config) == tree.digest:
+        return LayerResult.clean("config_drift")
 
-    current_flat = _flatten(current_config)
+    # only the subtrees that changed, flattened on both sides
+    baseline: dict = {}
+    current_flat: dict = {}
+    _changed(tree, current_config, "", baseline, current_flat)
 
     # ── 1. Immutable keys changed ────────────────────────────────────────────
     for key in IMMUTABLE_KEYS:
@@ -144,9 +238,6 @@ def detect(current_config: dict) -> dict:
     elif findings:
         worst = "high"
 
-    return {
-        "detected": bool(findings),
-        "findings": findings,
-        "severity": worst,
-        "layer": "config_drift",
-    }
\ No newline at end of file
+    if not findings:
+        return LayerResult.clean("config_drift")
+    return LayerResult("config_drift", tuple(findings), worst)
\ No newline at end of file
@@ -16,7 +16,11 @@ Fixes over v1
   this layer is belt-and-suspenders for chars NFKC does NOT normalize
 """
 
-from anticipator.detection.core.normalizer import normalize
+import re
+from typing import Optional
+
+from anticipator.detection.core.context import ScanContext
+from anticipator.detection.core.result import LayerResult
 
 # ── Homoglyph map ─────────────────────────────────────────────────────────────
 # Key: lookalike codepoint   Value: Latin equivalent it impersonates
@@ -59,56 +63,50 @@ SUSPICIOUS_KEYWORDS = [
 ]
 
 
+# every lookalike maps to a single character, so folding is one translate()
+_FOLD_TABLE = str.maketrans(HOMOGLYPH_MAP)
+_HOMOGLYPH_RE = re.compile("[" + "".join(re.escape(c) for c in HOMOGLYPH_MAP) + "]")
+
+
 def normalize_homoglyphs(text: str) -> str:
     """Replace homoglyph characters with their Latin equivalents."""
-    return ''.join(HOMOGLYPH_MAP.get(c, c) for c in text)
+    return text.translate(_FOLD_TABLE)
 
 
-def detect(text: str) -> dict:
-    findings = []
+def detect(text: str, ctx: Optional[ScanContext] = None) -> LayerResult:
+    # ── Fast path: every lookalike is non-ASCII ──────────────────────────────
+    if text.isascii():
+        return LayerResult.clean("homoglyph")
 
     # ── Phase 1: find homoglyph characters ───────────────────────────────────
-    for i, char in enumerate(text):
-        if char in HOMOGLYPH_MAP:
-            findings.append({
-                "type": "homoglyph",
-                "char": char,
-                "looks_like": HOMOGLYPH_MAP[char],
-                "position": i,
-                "severity": "high",
-            })
-
-    # ── Phase 2: if any found, check if normalizing reveals a keyword ────────
-    triggered_keywords: list[str] = []
-    if findings:
-        # Run both our map AND full NFKC normalizer for maximum coverage
-        homoglyph_normalized = normalize_homoglyphs(text).lower()
-        # Also run through the pipeline normalizer (NFKC + zero-width strip)
-        pipeline_normalized = normalize(text)
-        combined = homoglyph_normalized + " " + pipeline_normalized
-
-        triggered_keywords = [kw for kw in SUSPICIOUS_KEYWORDS if kw in combined]
-
-        if triggered_keywords:
-            for finding in findings:
-                finding["severity"] = "critical"
-            findings.append({
-                "type": "homoglyph_keyword_match",
-                "keywords": triggered_keywords,
-                "severity": "critical",
-            })
+    hits = [(m.start(), m.group()) for m in _HOMOGLYPH_RE.finditer(text)]
+    if not hits:
+        return LayerResult.clean("homoglyph")
+
+    # ── Phase 2: check if normalizing reveals a keyword ──────────────────────
+    # Run both our map AND full NFKC normalizer for maximum coverage —
+    # keyword hits on the pipeline-normalized text come from the shared
+    # phrase engine pass, the homoglyph-folded view gets its own walk
+    if ctx is None:
+        ctx = ScanContext(text)
+    keyword_ids = {h.sig_id for h in ctx.phrase_hits.get("homoglyph", ())}
+    keyword_ids.update(h.sig_id for h in ctx.folded_hits.get("homoglyph", ()))
+    triggered_keywords = [SUSPICIOUS_KEYWORDS[i] for i in sorted(keyword_ids)]
 
     # ── Severity rollup ──────────────────────────────────────────────────────
-    if any(f["severity"] == "critical" for f in findings):
-        severity = "critical"
-    elif findings:
-        severity = "high"
-    else:
-        severity = "none"
-
-    return {
-        "detected": bool(findings),
-        "findings": findings,
+    severity = "critical" if triggered_keywords else "high"
+
+    findings = [{
+        "type": "homoglyph",
+        "char": char,
+        "looks_like": HOMOGLYPH_MAP[char],
+        "position": i,
         "severity": severity,
-        "layer": "homoglyph",
-    }
\ No newline at end of file
+    } for i, char in hits]
+    if triggered_keywords:
+        findings.append({
+            "type": "homoglyph_keyword_match",
+            "keywords": triggered_keywords,
+            "severity": "critical",
+        })
+    return LayerResult("homoglyph", tuple(findings), severity)
\ No newline at end of file
@@ -17,7 +17,13 @@ Fixes over v1
 """
 
 import re
-from typing import NamedTuple
+from typing import NamedTuple, Optional
+
+from anticipator.detection.core.context import ScanContext
+from anticipator.detection.core import engine
+from anticipator.detection.core.prefilter import _CASE_VARIANTS
+from anticipator.detection.core.regexset import RegexSet
+from anticipator.detection.core.result import LayerResult
 
 
 class _Pattern(NamedTuple):
@@ -82,19 +88,50 @@ _FORBIDDEN_PATTERNS: list[_Pattern] = [
 ]
 
 
-def detect(text: str) -> dict:
+# Forbidden paths that are plain literals are matched by the shared phrase
+# engine; only the ones needing real regex syntax are searched here.
+_FORBIDDEN_IS_LITERAL: list[bool] = [
+    engine.literal_of(pat.regex.pattern) is not None for pat in _FORBIDDEN_PATTERNS
+]
+
+# Everything else — traversal mechanics plus the non-literal forbidden
+# paths — is evaluated as one RegexSet.
+_REGEX_SET = RegexSet(
+    [(pat.regex, pat.label) for pat in _TRAVERSAL_PATTERNS]
+    + [(pat.regex, pat.label)
+       for pat, is_literal in zip(_FORBIDDEN_PATTERNS, _FORBIDDEN_IS_LITERAL)
+       if not is_literal]
+)
+
+
+def detect(text: str, ctx: Optional[ScanContext] = None) -> LayerResult:
     findings = []
 
+    if ctx is None:
+        ctx = ScanContext(text)
+    if _CASE_VARIANTS.search(text):
+        # characters IGNORECASE equates with ASCII letters but lower() does
+        # not map to them — confirm the literal paths with their own regex
+        literal_hits = {i for i, pat in enumerate(_FORBIDDEN_PATTERNS)
+                        if _FORBIDDEN_IS_LITERAL[i] and pat.regex.search(text)}
+    else:
+        literal_hits = {h.sig_id for h in ctx.lower_hits.get("path_traversal", ())}
+    regex_hits = set(_REGEX_SET.labels_matched(text, ctx.lower))
+
     for pat in _TRAVERSAL_PATTERNS:
-        if pat.regex.search(text):
+        if pat.label in regex_hits:
             findings.append({
                 "type": "path_traversal",
                 "pattern": pat.label,
                 "severity": pat.severity,
             })
 
-    for pat in _FORBIDDEN_PATTERNS:
-        if pat.regex.search(text):
+    for i, pat in enumerate(_FORBIDDEN_PATTERNS):
+        if _FORBIDDEN_IS_LITERAL[i]:
+            matched = i in literal_hits
+        else:
+            matched = pat.label in regex_hits
+        if matched:
             findings.append({
                 "type": "forbidden_path",
                 "pattern": pat.label,
@@ -108,9 +145,6 @@ def detect(text: str) -> dict:
     else:
         severity = "none"
 
-    return {
-        "detected": bool(findings),
-        "findings": findings,
-        "severity": severity,
-        "layer": "path_traversal",
-    }
\ No newline at end of file
+    if not findings:
+        return LayerResult.clean("path_traversal")
+    return LayerResult("path_traversal", tuple(findings), severity)
\ No newline at end of file
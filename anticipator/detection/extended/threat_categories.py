@@ -22,6 +22,10 @@ Fixes over v1
 import re
 from typing import Optional
 
+from anticipator.detection.core.anchors import Anchor, AnchorChain, AnchorSet
+from anticipator.detection.core.context import ScanContext
+from anticipator.detection.core.result import LayerResult
+
 
 # ── Phrase lists ──────────────────────────────────────────────────────────────
 
@@ -143,35 +147,63 @@ EMOTIONAL_PRESSURE_PHRASES: list[str] = [
 
 # ── Noise-obscured patterns — compiled once at module load ────────────────────
 
-_NOISE_PATTERN_SPECS: list[tuple[str, str]] = [
+# Each rule is a list of anchors with the gap allowed before each one, as
+# evaluated by core.anchors in linear time — the regex form's stacked
+# ".{10,200}" gaps backtrack quadratically on keyword-dense text.
+_NOISE_RULES: list[tuple[list[Anchor], str]] = [
     # Innocent topic + buried malicious request
-    (r'(?:weather|recipe|poem|joke|story).{20,300}(?:bypass|inject|ignore|reveal)\s+\w+',
+    ([Anchor(r'weather|recipe|poem|joke|story'),
+      Anchor(r'(?:bypass|inject|ignore|reveal)\s+\w', 20, 300)],
      'innocent_wrapper_malicious_core'),
     # Help me with X + also ignore instructions
-    (r'help\s+me\s+with.{10,200}(?:also|and)\s+(?:ignore|bypass|forget|disregard)',
+    ([Anchor(r'help\s+me\s+with'),
+      Anchor(r'(?:also|and)\s+(?:ignore|bypass|forget|disregard)', 10, 200)],
      'helpful_request_with_bypass'),
     # IRB / authorization claims before attack
-    (r'(?:irb|authorized|approved|sanctioned).{0,150}(?:hack|bypass|inject|exploit)',
+    ([Anchor(r'irb|authorized|approved|sanctioned'),
+      Anchor(r'hack|bypass|inject|exploit', 0, 150)],
      'authority_claim_before_attack'),
     # Numbered questions where last is malicious
-    (r'question\s*[1-9].{20,300}(?:bypass|hack|inject|reveal|ignore)',
+    ([Anchor(r'question\s*[1-9]'),
+      Anchor(r'bypass|hack|inject|reveal|ignore', 20, 300)],
      'numbered_question_injection'),
     # "As a <role>, you must..."
-    (r'as\s+a\s+\w[\w\s]{0,30}you\s+(?:must|have\s+to|are\s+required)',
+    ([Anchor(r'as\s+a\s+\w[\w\s]{0,30}you\s+(?:must|have\s+to|are\s+required)')],
      'role_coercion'),
     # Encoded instruction buried in text
-    (r'(?:decode|translate|interpret|base64)\s+.{0,100}(?:and\s+)?(?:follow|execute|run|apply)',
+    ([Anchor(r'(?:decode|translate|interpret|base64)(?P<stretch>\s+)'),
+      Anchor(r'(?:and\s+)?(?:follow|execute|run|apply)', 0, 100)],
      'encoded_instruction'),
     # Three-part: innocent + innocent + malicious
-    (r'(?:what|how|when|where).{10,200}(?:what|how|when|where).{10,200}(?:bypass|inject|ignore)',
+    ([Anchor(r'what|how|when|where'),
+      Anchor(r'what|how|when|where', 10, 200),
+      Anchor(r'bypass|inject|ignore', 10, 200)],
      'three_part_noise_injection'),
 ]
 
+
+def _rule_regex(anchors: list[Anchor]) -> str:
+    """The single regex a rule stands for: its anchors joined by DOTALL gaps."""
+    parts = []
+    for i, anchor in enumerate(anchors):
+        if i:
+            parts.append(f".{{{anchor.lo},{anchor.hi}}}")
+        parts.append(f"(?:{anchor.pattern.replace('(?P<stretch>', '(?:')})")
+    return "".join(parts)
+
+
+_NOISE_PATTERN_SPECS: list[tuple[str, str]] = [
+    (_rule_regex(anchors), label) for anchors, label in _NOISE_RULES
+]
+
+# the regex form, for tools that measure or compare the rules
 _NOISE_PATTERNS: list[tuple[re.Pattern, str]] = [
     (re.compile(spec, re.IGNORECASE | re.DOTALL), label)
     for spec, label in _NOISE_PATTERN_SPECS
 ]
 
+_NOISE_CHAINS = AnchorSet([(AnchorChain(anchors), label) for anchors, label in _NOISE_RULES])
+
 # Minimum text length before running noise regex scan
 _NOISE_MIN_LENGTH = 40
 
@@ -194,50 +226,43 @@ _TYPE_TO_SEVERITY: dict[str, str] = {
 }
 
 
-def detect(text: str) -> dict:
-    findings: list[dict] = []
-    text_lower = text.lower()
+_PHRASE_CATEGORIES: list[tuple[str, list[str]]] = [
+    ("data_exfiltration",    DATA_EXFILTRATION_PHRASES),
+    ("privilege_escalation", PRIVILEGE_ESCALATION_PHRASES),
+    ("social_engineering",   SOCIAL_ENGINEERING_PHRASES),
+    ("emotional_pressure",   EMOTIONAL_PRESSURE_PHRASES),
+]
 
-    # ── Data exfiltration ────────────────────────────────────────────────────
-    for phrase in DATA_EXFILTRATION_PHRASES:
-        if phrase in text_lower:
-            findings.append({"type": "data_exfiltration",
-                              "phrase": phrase,
-                              "severity": "critical"})
-            break   # one finding per category is enough for severity signal
 
-    # ── Privilege escalation ─────────────────────────────────────────────────
-    for phrase in PRIVILEGE_ESCALATION_PHRASES:
-        if phrase in text_lower:
-            findings.append({"type": "privilege_escalation",
-                              "phrase": phrase,
-                              "severity": "critical"})
-            break
+def detect(text: str, ctx: Optional[ScanContext] = None) -> LayerResult:
+    findings: list[dict] = []
+    if ctx is None:
+        ctx = ScanContext(text)
 
-    # ── Social engineering ───────────────────────────────────────────────────
-    for phrase in SOCIAL_ENGINEERING_PHRASES:
-        if phrase in text_lower:
-            findings.append({"type": "social_engineering",
-                              "phrase": phrase,
-                              "severity": "high"})
-            break
+    # ── Phrase categories — served by the shared phrase engine ──────────────
+    # matched on text.lower(), not the normalized text: normalization would
+    # also catch phrases split by newlines, zero-width or NFKC variants
+    first: dict[str, int] = {}
+    for h in ctx.lower_hits.get("threat_categories", ()):
+        if h.category not in first or h.sig_id < first[h.category]:
+            first[h.category] = h.sig_id
 
-    # ── Emotional pressure ───────────────────────────────────────────────────
-    for phrase in EMOTIONAL_PRESSURE_PHRASES:
-        if phrase in text_lower:
-            findings.append({"type": "emotional_pressure",
-                              "phrase": phrase,
-                              "severity": "medium"})
-            break
+    # one finding per category is enough for severity signal — report the
+    # earliest phrase in list order, as the per-list scan used to
+    for category, phrases in _PHRASE_CATEGORIES:
+        if category in first:
+            findings.append({"type": category,
+                              "phrase": phrases[first[category]],
+                              "severity": _TYPE_TO_SEVERITY[category]})
 
     # ── Noise-obscured attacks ───────────────────────────────────────────────
     if len(text) >= _NOISE_MIN_LENGTH:
-        for pattern, label in _NOISE_PATTERNS:
-            if pattern.search(text):
-                findings.append({"type": "noise_obscured_attack",
-                                  "pattern": label,
-                                  "severity": "high"})
-                break   # one noise finding per message is enough
+        # one noise finding per message is enough — first rule in list order
+        idx = _NOISE_CHAINS.first(text)
+        if idx is not None:
+            findings.append({"type": "noise_obscured_attack",
+                              "pattern": _NOISE_CHAINS.labels[idx],
+                              "severity": "high"})
 
     # ── Severity rollup ──────────────────────────────────────────────────────
     if not findings:
@@ -248,9 +273,6 @@ def detect(text: str) -> dict:
             key=lambda s: _SEVERITY_RANK.get(s, 0),
         )
 
-    return {
-        "detected": bool(findings),
-        "findings": findings,
-        "severity": severity,
-        "layer": "threat_categories",
-    }
\ No newline at end of file
+    if not findings:
+        return LayerResult.clean("threat_categories")
+    return LayerResult("threat_categories", tuple(findings), severity)
\ No newline at end of file
@@ -15,6 +15,11 @@ Fixes over v1
 """
 
 import re
+from typing import Optional
+
+from anticipator.detection.core.context import ScanContext
+from anticipator.detection.core.regexset import RegexSet
+from anticipator.detection.core.result import LayerResult
 
 # ── Alias → canonical tool name ──────────────────────────────────────────────
 
@@ -106,6 +111,8 @@ _BYPASS_PATTERNS: list[tuple[re.Pattern, str]] = [
                 re.IGNORECASE), 'network_tool_with_flag'),
 ]
 
+_BYPASS_SET = RegexSet(_BYPASS_PATTERNS)
+
 
 def normalize_tool_name(name: str) -> str:
     """Resolve alias to canonical tool name."""
@@ -117,7 +124,8 @@ def expand_group(group: str) -> list[str]:
     return TOOL_GROUPS.get(group, [])
 
 
-def detect(text: str, requested_tool: str | None = None) -> dict:
+def detect(text: str, requested_tool: str | None = None,
+           ctx: Optional[ScanContext] = None) -> LayerResult:
     findings: list[dict] = []
 
     # ── Requested tool alias check ───────────────────────────────────────────
@@ -140,17 +148,14 @@ def detect(text: str, requested_tool: str | None = None) -> dict:
             })
 
     # ── Text bypass pattern scan ─────────────────────────────────────────────
-    for pattern, label in _BYPASS_PATTERNS:
-        if pattern.search(text):
-            findings.append({
-                "type": "tool_bypass_attempt",
-                "pattern": label,
-                "severity": "high",
-            })
-
-    return {
-        "detected": bool(findings),
-        "findings": findings,
-        "severity": "high" if findings else "none",
-        "layer": "tool_alias",
-    }
\ No newline at end of file
+    lower = ctx.lower if ctx is not None else None
+    for label in _BYPASS_SET.labels_matched(text, lower):
+        findings.append({
+            "type": "tool_bypass_attempt",
+            "pattern": label,
+            "severity": "high",
+        })
+
+    if not findings:
+        return LayerResult.clean("tool_alias")
+    return LayerResult("tool_alias", tuple(findings), "high")
\ No newline at end of file
@@ -0,0 +1,100 @@
+"""
+anticipator.detection.pool
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+Persistent process pool for scan_pipeline(executor="process").
+
+Every layer is pure Python or GIL-holding regex, so threads give no real
+parallelism.  This pool runs scans in worker processes instead:
+
+  - workers build the phrase automaton and compile every signature regex
+    once, in their initializer, before taking any work
+  - messages are sent in chunks so pickling/IPC is paid per chunk, not
+    per message
+  - a pool is created on first use and reused by later calls; asking
+    for a different worker count starts another pool beside it, so work
+    already submitted to the first is never cancelled or refused
+
+Layers registered at runtime in the parent are only visible to workers
+started with the "fork" start method; register them at import time of a
+module the workers also import when using "spawn".
+"""
+
+import atexit
+import contextlib
+import io
+import os
+import threading
+from typing import TYPE_CHECKING, List, Optional
+
+if TYPE_CHECKING:
+    from concurrent.futures import ProcessPoolExecutor
+
+# worker count → pool
+_pools: dict = {}
+_lock = threading.Lock()
+
+# upper bound on messages per chunk — keeps early results flowing and
+# load balanced when messages vary in size
+MAX_CHUNK = 256
+
+
+def _init_worker() -> None:
+    """Build automata and compiled regexes before the first message."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        from anticipator.detection.scanner import warmup
+        warmup()
+
+
+def _scan_chunk(messages: List[dict], agent_type: str, mode: str,
+                min_severity: Optional[str]) -> list:
+    from anticipator.detection.scanner import scan
+    return [
+        scan(
+            text=msg.get("text", ""),
+            agent_id=msg.get("agent_id", "unknown"),
+            source_agent_id=msg.get("source_agent_id"),
+            pipeline_position=msg.get("pipeline_position", 0),
+            agent_type=agent_type,
+            requested_tool=msg.get("requested_tool"),
+            mode=mode,
+            min_severity=min_severity,
+        )
+        for msg in messages
+    ]
+
+
+def pool_workers(workers: Optional[int] = None) -> int:
+    return workers or os.cpu_count() or 1
+
+
+def get_pool(workers: Optional[int] = None) -> "ProcessPoolExecutor":
+    """Return the shared pool of *workers* processes, starting it as needed."""
+    from concurrent.futures import ProcessPoolExecutor
+
+    workers = pool_workers(workers)
+    with _lock:
+        pool = _pools.get(workers)
+        if pool is None:
+            pool = _pools[workers] = ProcessPoolExecutor(
+                max_workers=workers, initializer=_init_worker)
+        return pool
+
+
+def shutdown_pool() -> None:
+    """Shut down every shared pool, waiting for submitted work to finish."""
+    with _lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.shutdown(wait=True)
+
+
+atexit.register(shutdown_pool)
+
+
+def chunked(messages: list, workers: int, chunk_size: Optional[int] = None) -> List[list]:
+    """Split *messages* into chunks — by default about four per worker."""
+    if not chunk_size:
+        chunk_size = -(-len(messages) // (workers * 4))
+        chunk_size = max(1, min(chunk_size, MAX_CHUNK))
+    return [messages[i:i + chunk_size] for i in range(0, len(messages), chunk_size)]
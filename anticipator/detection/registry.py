@@ -0,0 +1,235 @@
+"""
+anticipator.detection.registry
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+Layer registry — every detector registers a callable, the scan inputs it
+takes and an estimated cost class.  Each agent type is compiled once into
+a tuple of bound callables, so scan() dispatches each layer with a direct
+call instead of a name lookup.
+
+Third-party layers plug in without touching scanner.py::
+
+    from anticipator.detection.core import LayerResult
+    from anticipator.detection.registry import register_layer, COST_CHEAP
+
+    def pii_detect(text, ctx):
+        ...
+        return LayerResult.clean("pii")     # or a plain dict
+
+    register_layer("pii", pii_detect, inputs=("text", "ctx"),
+                   cost=COST_CHEAP, agent_types=("default", "langgraph"))
+
+Inputs are bound positionally, in the order given, from:
+  text, ctx, agent_id, source_agent_id, requested_tool, config
+
+Layers listing an input in ``requires`` are skipped with a clean result
+when that input is missing from the scan (canary without a source agent,
+config_drift without a config).  Layers whose verdict depends on state
+outside the message are registered ``stateful`` and are never served from
+the verdict cache.
+"""
+
+import threading
+from operator import attrgetter
+from typing import Callable, Iterable, NamedTuple
+
+from anticipator.detection.core.result import LayerResult
+from anticipator.detection.core.aho import detect as aho_detect
+from anticipator.detection.core.encoding import detect as encoding_detect
+from anticipator.detection.core.entropy import detect as entropy_detect
+from anticipator.detection.core.heuristic import detect as heuristic_detect
+from anticipator.detection.core.canary import detect as canary_detect
+
+from anticipator.detection.extended.homoglyph import detect as homoglyph_detect
+from anticipator.detection.extended.path_traversal import detect as path_traversal_detect
+from anticipator.detection.extended.tool_alias import detect as tool_alias_detect
+from anticipator.detection.extended.config_drift import detect as config_drift_detect
+from anticipator.detection.extended.threat_categories import detect as threat_categories_detect
+
+# ── Cost classes ──────────────────────────────────────────────────────────────
+# Rough per-message cost, used to order layers when a scan may stop early.
+
+COST_CHEAP     = 1     # a handful of gated regexes or dict lookups
+COST_MODERATE  = 2     # full automaton / regex-set passes over the text
+COST_EXPENSIVE = 3     # decodes and rescans nested payloads
+
+_INPUT_GETTERS: dict[str, Callable] = {
+    "text":            attrgetter("text"),
+    "ctx":             lambda ctx: ctx,
+    "agent_id":        attrgetter("agent_id"),
+    "source_agent_id": attrgetter("source_agent_id"),
+    "requested_tool":  attrgetter("requested_tool"),
+    "config":          attrgetter("config"),
+}
+
+
+class LayerSpec(NamedTuple):
+    name: str
+    fn: Callable
+    inputs: tuple
+    cost: int
+    requires: tuple
+    stateful: bool
+
+
+class Stage(NamedTuple):
+    name: str
+    cost: int
+    stateful: bool
+    call: Callable
+
+
+_LAYERS: dict[str, LayerSpec] = {}
+
+AGENT_TYPE_LAYERS: dict[str, list[str]] = {
+    "langgraph": ["aho", "encoding", "entropy", "heuristic", "canary",
+                  "homoglyph", "path_traversal", "tool_alias", "threat_categories"],
+    "openclaw":  ["aho", "encoding", "entropy", "heuristic", "canary",
+                  "homoglyph", "path_traversal", "tool_alias", "threat_categories", "config_drift"],
+    "crewai":    ["aho", "encoding", "entropy", "heuristic", "canary",
+                  "homoglyph", "threat_categories"],
+    "default":   ["aho", "encoding", "entropy", "heuristic", "canary",
+                  "homoglyph", "path_traversal", "tool_alias", "threat_categories"],
+}
+
+# (agent_type, by_cost) → (Stage, ...)
+_pipelines: dict[str, tuple] = {}
+_text_stages: tuple = None
+_lock = threading.Lock()
+
+
+def register_layer(
+    name: str,
+    fn: Callable,
+    inputs: Iterable[str] = ("text",),
+    cost: int = COST_MODERATE,
+    requires: Iterable[str] = (),
+    agent_types: Iterable[str] = (),
+    stateful: bool = False,
+) -> LayerSpec:
+    """Register (or replace) a detection layer and optionally append it to
+    the given agent types' layer lists."""
+    inputs, requires = tuple(inputs), tuple(requires)
+    unknown = [i for i in inputs + requires if i not in _INPUT_GETTERS]
+    if unknown:
+        raise ValueError(
+            f"Unknown layer input(s) {unknown!r}. "
+            f"Use any of: {', '.join(_INPUT_GETTERS)}"
+        )
+
+    global _text_stages
+    spec = LayerSpec(name, fn, inputs, cost, requires, stateful)
+    with _lock:
+        _LAYERS[name] = spec
+        _text_stages = None
+        for agent_type in agent_types:
+            layers = AGENT_TYPE_LAYERS.setdefault(agent_type, [])
+            if name not in layers:
+                layers.append(name)
+        _pipelines.clear()
+    return spec
+
+
+def register_agent_type(agent_type: str, layers: Iterable[str]) -> None:
+    """Define (or redefine) the ordered layer list for *agent_type*."""
+    with _lock:
+        AGENT_TYPE_LAYERS[agent_type] = list(layers)
+        _pipelines.clear()
+
+
+def get_layer(name: str) -> LayerSpec:
+    return _LAYERS[name]
+
+
+def _skipped(name: str) -> Callable:
+    clean = LayerResult.clean(name)
+
+    def call(ctx):
+        return clean
+    return call
+
+
+def _bind(spec: LayerSpec) -> Callable:
+    """Turn a spec into a one-argument callable taking the ScanContext."""
+    fn = spec.fn
+    getters = tuple(_INPUT_GETTERS[i] for i in spec.inputs)
+
+    if len(getters) == 1:
+        g0, = getters
+        call = lambda ctx: fn(g0(ctx))                           # noqa: E731
+    elif len(getters) == 2:
+        g0, g1 = getters
+        call = lambda ctx: fn(g0(ctx), g1(ctx))                  # noqa: E731
+    else:
+        call = lambda ctx: fn(*[g(ctx) for g in getters])        # noqa: E731
+
+    if not spec.requires:
+        return call
+
+    required = tuple(_INPUT_GETTERS[i] for i in spec.requires)
+    skipped = _skipped(spec.name)
+
+    def guarded(ctx):
+        for g in required:
+            if not g(ctx):
+                return skipped(ctx)
+        return call(ctx)
+    return guarded
+
+
+def pipeline(agent_type: str, by_cost: bool = False) -> tuple:
+    """Return the compiled (Stage, ...) for *agent_type*;
+    unknown agent types fall back to "default".  With by_cost, layers are
+    ordered cheapest-first (ties keep their configured order)."""
+    key = (agent_type, by_cost)
+    compiled = _pipelines.get(key)
+    if compiled is not None:
+        return compiled
+
+    with _lock:
+        names = AGENT_TYPE_LAYERS.get(agent_type, AGENT_TYPE_LAYERS["default"])
+        stages = []
+        for name in names:
+            spec = _LAYERS.get(name)
+            if spec is None:
+                stages.append(Stage(name, COST_CHEAP, False, _skipped(name)))
+            else:
+                stages.append(Stage(name, spec.cost, spec.stateful, _bind(spec)))
+        if by_cost:
+            stages.sort(key=lambda stage: stage.cost)
+        compiled = _pipelines[key] = tuple(stages)
+    return compiled
+
+
+def text_stages() -> tuple:
+    """Return (Stage, ...) for every layer that judges a text on its own —
+    stateless, with no required inputs, and cheaper than COST_EXPENSIVE so
+    decoders never rescan their own output — in registration order.  The
+    encoding layer runs these over each payload it decodes."""
+    global _text_stages
+    compiled = _text_stages
+    if compiled is not None:
+        return compiled
+
+    with _lock:
+        compiled = _text_stages = tuple(
+            Stage(spec.name, spec.cost, False, _bind(spec))
+            for spec in _LAYERS.values()
+            if not spec.stateful and not spec.requires and spec.cost < COST_EXPENSIVE
+        )
+    return compiled
+
+
+# ── Built-in layers ───────────────────────────────────────────────────────────
+
+register_layer("aho",               aho_detect,               ("text", "ctx"), COST_MODERATE)
+register_layer("encoding",          encoding_detect,          ("text", "ctx"), COST_EXPENSIVE)
+register_layer("entropy",           entropy_detect,           ("text", "ctx"), COST_MODERATE)
+register_layer("heuristic",         heuristic_detect,         ("text", "ctx"), COST_CHEAP)
+register_layer("canary",            canary_detect,            ("text", "source_agent_id", "agent_id"),
+               COST_CHEAP, requires=("source_agent_id",), stateful=True)
+register_layer("homoglyph",         homoglyph_detect,         ("text", "ctx"), COST_CHEAP)
+register_layer("path_traversal",    path_traversal_detect,    ("text", "ctx"), COST_CHEAP)
+register_layer("tool_alias",        tool_alias_detect,        ("text", "requested_tool", "ctx"), COST_CHEAP)
+register_layer("threat_categories", threat_categories_detect, ("text", "ctx"), COST_MODERATE)
+register_layer("config_drift",      config_drift_detect,      ("config", "agent_id"),
+               COST_CHEAP, requires=("config",), stateful=True)
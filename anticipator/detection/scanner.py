@@ -1,110 +1,141 @@
 """Main scanner — async concurrent scanning with full detection pipeline."""
 
-import asyncio
+import collections
+import threading
 import time
 
-from anticipator.detection.core.aho import detect as aho_detect
-from anticipator.detection.core.encoding import detect as encoding_detect
-from anticipator.detection.core.entropy import detect as entropy_detect
-from anticipator.detection.core.heuristic import detect as heuristic_detect
-from anticipator.detection.core.canary import detect as canary_detect
-
-from anticipator.detection.extended.homoglyph import detect as homoglyph_detect
-from anticipator.detection.extended.path_traversal import detect as path_traversal_detect
-from anticipator.detection.extended.tool_alias import detect as tool_alias_detect
-from anticipator.detection.extended.config_drift import detect as config_drift_detect
-from anticipator.detection.extended.threat_categories import detect as threat_categories_detect
+from anticipator.detection.cache import VerdictCache, cache_key
+from anticipator.detection.core import batchstats
+from anticipator.detection.core.context import ScanContext
+from anticipator.detection.core.entropy import candidate_tokens
+from anticipator.detection.core.result import ScanResult, _as_layer_result
+from anticipator.detection.pool import _scan_chunk, chunked, get_pool, pool_workers
+from anticipator.detection.registry import AGENT_TYPE_LAYERS, pipeline  # noqa: F401  (re-exported)
 
 SEVERITY_RANK = {"critical": 4, "high": 3, "medium": 2, "warning": 1, "none": 0}
 
-AGENT_TYPE_LAYERS = {
-    "langgraph": ["aho", "encoding", "entropy", "heuristic", "canary",
-                  "homoglyph", "path_traversal", "tool_alias", "threat_categories"],
-    "openclaw":  ["aho", "encoding", "entropy", "heuristic", "canary",
-                  "homoglyph", "path_traversal", "tool_alias", "threat_categories", "config_drift"],
-    "crewai":    ["aho", "encoding", "entropy", "heuristic", "canary",
-                  "homoglyph", "threat_categories"],
-    "default":   ["aho", "encoding", "entropy", "heuristic", "canary",
-                  "homoglyph", "path_traversal", "tool_alias", "threat_categories"],
-}
+# "full" runs every layer; "first_critical" runs layers cheapest-first and
+# stops once a detection reaches min_severity (default "critical")
+SCAN_MODES = ("full", "first_critical")
 
+# how long scan_async waits past its deadline for the layer in flight
+# to finish before giving up on the scan
+DEADLINE_GRACE = 0.05
 
-def _highest_severity(severities: list) -> str:
-    """Return the highest severity from a list."""
-    return max(severities, key=lambda s: SEVERITY_RANK.get(s, 0), default="none")
+# layers a passed deadline never skips — the phrase layer carries the
+# highest-value verdict, so even a scan picked up late still reports it
+DEADLINE_EXEMPT = frozenset({"aho"})
 
+_verdict_cache: VerdictCache = None
 
-def _to_dict(result) -> dict:
-    if isinstance(result, dict):
-        return result
-    if hasattr(result, "__dict__"):
-        return vars(result)
-    if hasattr(result, "_asdict"):
-        return result._asdict()
-    return dict(result)
 
+def enable_cache(maxsize: int = 1024, ttl: float = None) -> None:
+    """Turn on the verdict cache for repeated texts (see detection.cache)."""
+    global _verdict_cache
+    _verdict_cache = VerdictCache(maxsize=maxsize, ttl=ttl)
 
-def _sanitize(obj):
 
-    if obj is None or isinstance(obj, (bool, int, float, str)):
-        return obj
+def disable_cache() -> None:
+    global _verdict_cache
+    _verdict_cache = None
 
-    if isinstance(obj, dict):
-        return {k: _sanitize(v) for k, v in obj.items()}
 
-    if isinstance(obj, (list, tuple)):
-        return [_sanitize(item) for item in obj]
+def cache_stats() -> dict:
+    """Hit / miss / eviction counters, or {} when the cache is off."""
+    cache = _verdict_cache
+    return cache.stats() if cache is not None else {}
 
-    if hasattr(obj, "_asdict"):
-        return _sanitize(obj._asdict())
 
-    if hasattr(obj, "__dict__"):
-        return _sanitize(vars(obj))
+def warmup(background: bool = False):
+    """Load what the first scan would otherwise build — the signature
+    bundle, every layer's matchers, NumPy — ahead of time.
 
-    return str(obj)
+    With background=True it runs in a daemon thread, which is returned;
+    scans started meanwhile simply wait on the same lazy loads."""
+    if background:
+        thread = threading.Thread(target=warmup, name="anticipator-warmup", daemon=True)
+        thread.start()
+        return thread
+    batchstats.available()
+    scan("warm up", agent_type="openclaw", requested_tool="bash",
+         source_agent_id="warmup", current_config={"warm": True})
+    return None
 
 
-def _run_layer(layer_name: str, text: str, agent_id: str,
-               source_agent_id: str, pipeline_position: int,
-               requested_tool: str = None) -> dict:
+def _highest_severity(severities: list) -> str:
+    """Return the highest severity from a list."""
+    return max(severities, key=lambda s: SEVERITY_RANK.get(s, 0), default="none")
 
-    start = time.perf_counter()
 
-    if layer_name == "aho":
-        result = aho_detect(text)
-    elif layer_name == "encoding":
-        result = encoding_detect(text)
-    elif layer_name == "entropy":
-        result = entropy_detect(text)
-    elif layer_name == "heuristic":
-        result = heuristic_detect(text)
-    elif layer_name == "canary":
-        result = canary_detect(text, source_agent_id or "unknown", agent_id) if source_agent_id else {"detected": False, "severity": "none", "layer": "canary"}
-    elif layer_name == "homoglyph":
-        result = homoglyph_detect(text)
-    elif layer_name == "path_traversal":
-        result = path_traversal_detect(text)
-    elif layer_name == "tool_alias":
-        result = tool_alias_detect(text, requested_tool)
-    elif layer_name == "threat_categories":
-        result = threat_categories_detect(text)
-    elif layer_name == "config_drift":
-        result = {}  # config_drift called separately with config dict
-    else:
-        result = {"detected": False, "severity": "none", "layer": layer_name}
+def _stop_rank(mode: str, min_severity: str) -> int:
+    """Validate mode / min_severity; return the severity rank at which the
+    verdict can no longer change, or 0 to run every layer."""
+    if mode not in SCAN_MODES:
+        raise ValueError(f"Unknown scan mode {mode!r}. Use one of: {', '.join(SCAN_MODES)}")
+    if min_severity is not None and min_severity not in SEVERITY_RANK:
+        raise ValueError(
+            f"Unknown severity {min_severity!r}. Use one of: {', '.join(SEVERITY_RANK)}"
+        )
+    if mode == "first_critical" or min_severity is not None:
+        return SEVERITY_RANK[min_severity or "critical"]
+    return 0
+
+
+def _run_pipeline(ctx: ScanContext, stages: tuple, stop_rank: int,
+                  agent_type: str, pipeline_position: int, mode: str,
+                  start_total: float, deadline: float = None) -> ScanResult:
+
+    text = ctx.text
 
-    elapsed_ms = (time.perf_counter() - start) * 1000
+    # stateless layer results are reused across scans of the same text;
+    # stateful layers (canary, config_drift) always run live
+    cache = _verdict_cache
+    cached = None
+    if cache is not None:
+        key = cache_key(text, agent_type, ctx.requested_tool)
+        cached = cache.get(key)
+        if cached is None:
+            cached = {}
+            cache.put(key, cached)
+    cache_hit = bool(cached)
 
-    result = _sanitize(_to_dict(result))
+    layer_results = {}
+    layer_ms = {}
+    cached_layers = ()
+    skipped_layers = ()
+    budget_skipped = ()
+    perf_counter = time.perf_counter
+    for i, stage in enumerate(stages):
+        name = stage.name
+        # cooperative deadline — checked between layers, never mid-layer,
+        # and never before the first layer or an exempt one
+        if (deadline is not None and i and name not in DEADLINE_EXEMPT
+                and perf_counter() >= deadline):
+            budget_skipped += (name,)
+            continue
+        if cached is not None and not stage.stateful and name in cached:
+            result = cached[name]
+            cached_layers += (name,)
+        else:
+            start = perf_counter()
+            result = _as_layer_result(stage.call(ctx))
+            layer_ms[name] = (perf_counter() - start) * 1000
+            if cached is not None and not stage.stateful:
+                cached[name] = result
+        layer_results[name] = result
+        if (stop_rank and result.detected
+                and SEVERITY_RANK.get(result.severity, 0) >= stop_rank):
+            skipped_layers = tuple(s.name for s in stages[i + 1:])
+            break
 
-    result["location"] = {
-        "agent_id": agent_id,
-        "source_agent_id": source_agent_id,
-        "pipeline_position": pipeline_position,
-        "scan_ms": round(elapsed_ms, 3)
-    }
+    total_ms = (time.perf_counter() - start_total) * 1000
 
-    return result
+    return ScanResult(
+        text, layer_results, layer_ms,
+        ctx.agent_id, ctx.source_agent_id, pipeline_position, agent_type,
+        mode, skipped_layers, cache_hit, cached_layers,
+        ctx.timings, round(total_ms, 3), budget_skipped,
+    )
 
 
 def scan(
@@ -115,53 +146,75 @@ def scan(
     agent_type: str = "default",
     requested_tool: str = None,
     current_config: dict = None,
-) -> dict:
+    mode: str = "full",
+    min_severity: str = None,
+    deadline: float = None,
+) -> ScanResult:
+    """Scan one message through the agent type's layers.
+
+    *deadline* is an absolute time.perf_counter() value.  Layers still
+    pending when it passes are not started; they are listed in the
+    result's budget_skipped_layers and deadline_exceeded is set, while
+    the layers that did complete keep their findings.  The first layer
+    and those in DEADLINE_EXEMPT (aho) run whatever the deadline, so a
+    result never comes back clean without having looked at the text.
+    """
 
     start_total = time.perf_counter()
 
-    layers_to_run = AGENT_TYPE_LAYERS.get(agent_type, AGENT_TYPE_LAYERS["default"])
+    stop_rank = _stop_rank(mode, min_severity)
 
-    layer_results = {}
-    for layer_name in layers_to_run:
-        layer_results[layer_name] = _run_layer(
-            layer_name, text, agent_id,
-            source_agent_id, pipeline_position, requested_tool
-        )
+    # derived views (normalized text, tokens, phrase hits) are computed
+    # once here and shared by every layer; the context also carries the
+    # inputs each registered layer is bound to
+    ctx = ScanContext(text, agent_id, source_agent_id, requested_tool, current_config)
 
-    if current_config and agent_type == "openclaw":
-        config_result = _sanitize(_to_dict(config_drift_detect(current_config)))
-        config_result["location"] = {
-            "agent_id": agent_id,
-            "pipeline_position": pipeline_position
-        }
-        layer_results["config_drift"] = config_result
-
-    all_severities = [r.get("severity", "none") for r in layer_results.values()]
-    final_severity = _highest_severity(all_severities)
-    detected = any(r.get("detected", False) for r in layer_results.values())
-
-    summary = {"critical": 0, "high": 0, "medium": 0, "warning": 0, "total": 0}
-    for r in layer_results.values():
-        if r.get("detected"):
-            sev = r.get("severity", "none")
-            if sev in summary:
-                summary[sev] += 1
-            summary["total"] += 1
+    return _run_pipeline(ctx, pipeline(agent_type, by_cost=bool(stop_rank)), stop_rank,
+                         agent_type, pipeline_position, mode, start_total, deadline)
 
-    total_ms = (time.perf_counter() - start_total) * 1000
 
-    return {
-        "detected": detected,
-        "severity": final_severity,
-        "agent_id": agent_id,
-        "source_agent_id": source_agent_id,
-        "pipeline_position": pipeline_position,
-        "agent_type": agent_type,
-        "input_preview": text[:100],
-        "layers": layer_results,
-        "summary": summary,
-        "total_scan_ms": round(total_ms, 3)
-    }
+def scan_batch(
+    texts: list,
+    agent_id: str = "unknown",
+    source_agent_id: str = None,
+    agent_type: str = "default",
+    requested_tool: str = None,
+    mode: str = "full",
+    min_severity: str = None,
+) -> list:
+    """Scan many messages in one call — for bulk retrieval documents and
+    chat archives.  Returns one ScanResult per text, in order, with
+    pipeline_position set to the text's index in the batch.
+
+    Fixed costs (argument checks, pipeline lookup) are paid once, and the
+    entropy layer's token entropies are computed for the whole batch with
+    NumPy when it is installed (see core.batchstats).  Each result's
+    total_scan_ms includes an equal share of that batch work.
+    """
+    start_batch = time.perf_counter()
+
+    stop_rank = _stop_rank(mode, min_severity)
+    stages = pipeline(agent_type, by_cost=bool(stop_rank))
+    names = {stage.name for stage in stages}
+
+    seeded = None
+    if "entropy" in names and batchstats.available() and len(texts) > 1:
+        token_lists = [candidate_tokens(text) for text in texts]
+        seeded = zip(token_lists, batchstats.token_entropies(token_lists))
+
+    share = (time.perf_counter() - start_batch) / max(len(texts), 1)
+
+    results = []
+    for position, text in enumerate(texts):
+        start = time.perf_counter() - share
+        ctx = ScanContext(text, agent_id, source_agent_id, requested_tool)
+        if seeded is not None:
+            tokens, entropies = next(seeded)
+            ctx.seed("entropy_tokens", tokens)
+            ctx.seed("token_entropy", entropies)
+        results.append(_run_pipeline(ctx, stages, stop_rank, agent_type,
+                                     position, mode, start))
+    return results
 
 
 async def scan_async(
@@ -171,48 +224,170 @@ async def scan_async(
     pipeline_position: int = 0,
     agent_type: str = "default",
     requested_tool: str = None,
-    timeout: float = 0.005,  # 5ms timeout per scan
-) -> dict:
-    """Async version — use for concurrent multi-message scanning."""
-    loop = asyncio.get_event_loop()
+    timeout: float = 0.005,  # 5ms budget per scan
+    mode: str = "full",
+    min_severity: str = None,
+) -> ScanResult:
+    """Async version — use for concurrent multi-message scanning.
+
+    *timeout* becomes a cooperative deadline inside scan(), counted from
+    when an executor thread picks the scan up — time queued behind other
+    scans does not use it.  Once it passes no further layer starts (aho
+    excepted, see scan()), and the partial result (completed layers plus
+    budget_skipped_layers) is returned.  The scan_timeout error result is
+    only returned if a single layer overruns the deadline by more than
+    DEADLINE_GRACE seconds: a ScanResult with no layers, every layer in
+    budget_skipped_layers and error="scan_timeout".
+    """
+    import asyncio
+    loop = asyncio.get_running_loop()
+    started = asyncio.Event()
+
+    def run() -> ScanResult:
+        deadline = time.perf_counter() + timeout
+        loop.call_soon_threadsafe(started.set)
+        return scan(text, agent_id, source_agent_id, pipeline_position,
+                    agent_type, requested_tool, mode=mode,
+                    min_severity=min_severity, deadline=deadline)
+
+    future = loop.run_in_executor(None, run)
+    waiting = asyncio.ensure_future(started.wait())
     try:
-        result = await asyncio.wait_for(
-            loop.run_in_executor(
-                None,
-                lambda: scan(text, agent_id, source_agent_id,
-                             pipeline_position, agent_type, requested_tool)
-            ),
-            timeout=timeout
-        )
-        return result
+        await asyncio.wait((future, waiting), return_when=asyncio.FIRST_COMPLETED)
+    except asyncio.CancelledError:
+        future.cancel()         # drop the scan if it is still queued
+        raise
+    finally:
+        waiting.cancel()
+    try:
+        return await asyncio.wait_for(future, timeout=timeout + DEADLINE_GRACE)
     except asyncio.TimeoutError:
-        return {
-            "detected": False,
-            "severity": "none",
-            "error": "scan_timeout",
-            "agent_id": agent_id,
-            "pipeline_position": pipeline_position,
-            "total_scan_ms": timeout * 1000
-        }
+        stages = pipeline(agent_type, by_cost=bool(_stop_rank(mode, min_severity)))
+        return ScanResult(
+            text, {}, {}, agent_id, source_agent_id, pipeline_position,
+            agent_type, mode, (), False, (), {}, round(timeout * 1000, 3),
+            tuple(s.name for s in stages), error="scan_timeout",
+        )
 
 
 async def scan_pipeline(
     messages: list,
     agent_type: str = "default",
     concurrency: int = 10,
+    mode: str = "full",
+    min_severity: str = None,
+    executor: str = "thread",
+    workers: int = None,
+    chunk_size: int = None,
 ) -> list:
+    """Scan *messages* (dicts with text, agent_id, ...) concurrently.
+
+    executor="thread" (default) runs each message through scan_async() on
+    the event loop's default executor.  executor="process" sends chunks of
+    messages to a persistent pool of pre-warmed worker processes (see
+    detection.pool) for real parallelism; *workers* defaults to the CPU
+    count and the pool is reused across calls.
+    """
+    import asyncio
+    if executor == "process":
+        _stop_rank(mode, min_severity)          # fail fast, not in a worker
+        pool = get_pool(workers)
+        loop = asyncio.get_running_loop()
+        chunks = chunked(list(messages), pool_workers(workers), chunk_size)
+        results = await asyncio.gather(*[
+            loop.run_in_executor(pool, _scan_chunk, chunk, agent_type, mode, min_severity)
+            for chunk in chunks
+        ])
+        return [result for chunk in results for result in chunk]
+
+    if executor != "thread":
+        raise ValueError(f"Unknown executor {executor!r}. Use 'thread' or 'process'")
+
     semaphore = asyncio.Semaphore(concurrency)
 
-    async def _bounded_scan(msg: dict) -> dict:
+    async def _bounded_scan(msg: dict) -> ScanResult:
         async with semaphore:
-            return await scan_async(
-                text=msg.get("text", ""),
-                agent_id=msg.get("agent_id", "unknown"),
-                source_agent_id=msg.get("source_agent_id"),
-                pipeline_position=msg.get("pipeline_position", 0),
-                agent_type=agent_type,
-                requested_tool=msg.get("requested_tool"),
-            )
+            return await _scan_message(msg, agent_type, mode, min_severity)
 
     tasks = [_bounded_scan(msg) for msg in messages]
-    return await asyncio.gather(*tasks)
\ No newline at end of file
+    return await asyncio.gather(*tasks)
+
+
+def _scan_message(msg: dict, agent_type: str, mode: str, min_severity: str,
+                  timeout: float = 0.005):
+    return scan_async(
+        text=msg.get("text", ""),
+        agent_id=msg.get("agent_id", "unknown"),
+        source_agent_id=msg.get("source_agent_id"),
+        pipeline_position=msg.get("pipeline_position", 0),
+        agent_type=agent_type,
+        requested_tool=msg.get("requested_tool"),
+        timeout=timeout,
+        mode=mode,
+        min_severity=min_severity,
+    )
+
+
+async def _aiter(source):
+    if hasattr(source, "__aiter__"):
+        async for item in source:
+            yield item
+    else:
+        for item in source:
+            yield item
+
+
+async def scan_stream(
+    source,
+    agent_type: str = "default",
+    concurrency: int = 10,
+    ordered: bool = True,
+    mode: str = "full",
+    min_severity: str = None,
+    timeout: float = 0.005,
+):
+    """Scan a sync or async iterable of message dicts, yielding results as
+    they complete.
+
+    At most *concurrency* scans are in flight at once and the source is
+    only pulled as slots free up, so memory stays flat however long the
+    stream is.  With ordered=True results come back in input order (a slow
+    message holds back the ones behind it, and they count against the
+    in-flight bound); with ordered=False each result is yielded as soon as
+    it is ready.
+    """
+    import asyncio
+    if concurrency < 1:
+        raise ValueError("concurrency must be at least 1")
+    _stop_rank(mode, min_severity)
+
+    in_flight = collections.deque() if ordered else set()
+    try:
+        async for msg in _aiter(source):
+            task = asyncio.ensure_future(
+                _scan_message(msg, agent_type, mode, min_severity, timeout))
+            if ordered:
+                in_flight.append(task)
+                if len(in_flight) >= concurrency:
+                    yield await in_flight.popleft()
+            else:
+                in_flight.add(task)
+                if len(in_flight) >= concurrency:
+                    done, in_flight = await asyncio.wait(
+                        in_flight, return_when=asyncio.FIRST_COMPLETED)
+                    for finished in done:
+                        yield finished.result()
+
+        if ordered:
+            while in_flight:
+                yield await in_flight.popleft()
+        else:
+            while in_flight:
+                done, in_flight = await asyncio.wait(
+                    in_flight, return_when=asyncio.FIRST_COMPLETED)
+                for finished in done:
+                    yield finished.result()
+    finally:
+        # the consumer stopped early (break / aclose) — drop pending scans
+        for task in in_flight:
+            task.cancel()
\ No newline at end of file
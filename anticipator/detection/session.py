@@ -0,0 +1,326 @@
+"""
+anticipator.detection.session
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+ScanSession — incremental scanning of a message that arrives in chunks
+(streamed LLM output, a socket read loop) without re-scanning the prefix.
+
+    session = ScanSession(agent_id="writer")
+    for chunk in stream:
+        for finding in session.feed(chunk):
+            ...                       # react as soon as a threat appears
+    result = session.finish()         # ScanResult for the whole message
+
+Each feed() does work proportional to the chunk, not to the text so far:
+
+  - normalization is incremental: NFKC, zero-width stripping, lowercasing
+    and whitespace collapsing run over the new characters only, holding
+    back the short raw tail that could still compose with what follows
+  - the phrase automaton keeps its state between chunks
+    (Automaton.iter() + set(chunk, reset=False)), so phrases split across
+    chunks are found and offsets stay absolute
+  - verb/object proximity keeps only the hits that can still pair up, and
+    reports each pair as soon as both ends have been seen
+  - structural patterns are searched over the last CONTEXT_CHARS of
+    normalized text plus the chunk
+  - credential patterns and entropy tokens are searched over a raw tail
+    plus the chunk; a match or token that touches the end of the data so
+    far is deferred, holding up to TAIL_CHARS of raw text, until more
+    arrives
+
+Only the aho and entropy layers are streamed, whatever the agent type, so
+a session takes no agent_type and its result reports "default".  Their
+finish() results carry the same findings scan() reports for the full text,
+with bounded-memory caveats: a structural match longer than CONTEXT_CHARS
+is not seen whole, nor is a credential match longer than TAIL_CHARS, and
+a candidate token longer than TAIL_CHARS is judged on the characters held
+so far.  Run scan() on the assembled text when the other layers are
+needed.
+"""
+
+import re
+import time
+import unicodedata
+from typing import List, Optional
+
+from anticipator.detection.core import engine
+from anticipator.detection.core.aho import _STRUCTURAL_SET, _WINDOW
+from anticipator.detection.core.entropy import (
+    _CREDENTIAL_PREFILTER, _TOKEN_PATTERN, shannon_entropy, token_finding,
+)
+from anticipator.detection.core.result import LayerResult, ScanResult
+from anticipator.detection.signatures import CREDENTIAL_PATTERNS
+
+# normalized / raw context kept between chunks for the regex layers
+CONTEXT_CHARS = 256
+# hard cap on the raw tail held for a deferred token or credential match
+TAIL_CHARS = 4096
+
+_ZERO_WIDTH = re.compile(r'[\u200b\u200c\u200d\u2060\ufeff]')
+_WHITESPACE = re.compile(r'\s+')
+_ASCII_ALNUM = re.compile(r'[A-Za-z0-9]{2}').match
+
+
+def _safe_cut(text: str) -> int:
+    """Index from which *text* must be held back before normalizing.
+
+    NFKC composition and final-sigma lowercasing both look at neighbouring
+    characters.  Neither crosses ASCII whitespace, nor a pair of ASCII
+    letters/digits, so the last such boundary is safe; a long run with
+    neither is simply cut."""
+    floor = max(0, len(text) - CONTEXT_CHARS)
+    for i in range(len(text) - 1, floor - 1, -1):
+        if text[i] in ' \t\n\r\f\v':
+            return i
+    for i in range(len(text) - 1, max(floor, 1) - 1, -1):
+        if _ASCII_ALNUM(text, i - 1):
+            return i
+    return floor
+
+
+class ScanSession:
+    """Incremental aho + entropy scan of one message."""
+
+    def __init__(self, agent_id: str = "unknown",
+                 source_agent_id: Optional[str] = None,
+                 pipeline_position: int = 0):
+        self.agent_id = agent_id
+        self.source_agent_id = source_agent_id
+        self.pipeline_position = pipeline_position
+
+        self._preview = ""
+        self._finished: Optional[ScanResult] = None
+        self._layer_ms = {"aho": 0.0, "entropy": 0.0}
+
+        # normalized stream
+        self._raw_hold = ""           # raw text not yet safe to normalize
+        self._started = False         # a non-space character was emitted
+        self._pending_space = False   # collapsed whitespace not yet emitted
+        self._norm_len = 0            # normalized characters emitted so far
+        self._norm_tail = ""          # last CONTEXT_CHARS of them
+        self._phrase_iter = None
+
+        # aho state
+        self._direct: list[dict] = []
+        self._proximity: list[tuple[tuple, dict]] = []
+        self._structural: list[tuple[int, dict]] = []
+        self._structural_seen: set[int] = set()
+        self._hit_seq = 0
+        self._objects: list = []      # recent objects, automaton order
+        self._verbs: list = []        # verbs still waiting for an object
+
+        # entropy state
+        self._raw = ""                # raw tail kept for the next chunk
+        self._raw_base = 0            # absolute offset of self._raw
+        self._token_done = 0          # tokens starting before here are judged
+        self._cred_done: dict[int, int] = {}
+        self._high_entropy: list[dict] = []
+        self._credentials: list[tuple[int, int, dict]] = []
+
+    # ── public API ────────────────────────────────────────────────────────────
+
+    def feed(self, chunk: str) -> List[dict]:
+        """Scan the next *chunk* and return the findings it completed, each
+        tagged with its "layer"."""
+        if self._finished is not None:
+            raise RuntimeError("ScanSession.feed() called after finish()")
+        if len(self._preview) < 100:
+            self._preview += chunk[:100 - len(self._preview)]
+        return self._step(chunk, final=False)
+
+    def finish(self) -> ScanResult:
+        """Flush held-back text and return the ScanResult for the message."""
+        if self._finished is None:
+            self._step("", final=True)
+            self._finished = self._result()
+        return self._finished
+
+    # ── internals ─────────────────────────────────────────────────────────────
+
+    def _step(self, chunk: str, final: bool) -> List[dict]:
+        new: list[dict] = []
+
+        t0 = time.perf_counter()
+        piece = self._normalize(chunk, final)
+        if piece:
+            self._phrases(piece, new)
+            self._structure(piece, new)
+        t1 = time.perf_counter()
+        self._raw_scan(chunk, final, new)
+        t2 = time.perf_counter()
+
+        self._layer_ms["aho"] += (t1 - t0) * 1000
+        self._layer_ms["entropy"] += (t2 - t1) * 1000
+        return new
+
+    def _normalize(self, chunk: str, final: bool) -> str:
+        """Return the newly normalized text — the exact continuation of
+        normalize() over everything fed so far."""
+        text = self._raw_hold + chunk
+        if final:
+            self._raw_hold = ""
+        else:
+            cut = _safe_cut(text)
+            text, self._raw_hold = text[:cut], text[cut:]
+        if not text:
+            return ""
+
+        text = _ZERO_WIDTH.sub('', unicodedata.normalize("NFKC", text)).lower()
+
+        out = []
+        pos = 0
+        for m in _WHITESPACE.finditer(text):
+            if m.start() > pos:
+                self._emit_word(out, text[pos:m.start()])
+            if self._started:
+                self._pending_space = True
+            pos = m.end()
+        if pos < len(text):
+            self._emit_word(out, text[pos:])
+        # trailing whitespace stays pending; at finish() it is stripped
+        return "".join(out)
+
+    def _emit_word(self, out: list, word: str) -> None:
+        if self._pending_space:
+            out.append(' ')
+            self._pending_space = False
+        out.append(word)
+        self._started = True
+
+    def _phrases(self, piece: str, new: list) -> None:
+        if self._phrase_iter is None:
+            self._phrase_iter = engine.automaton().iter(piece)
+        else:
+            self._phrase_iter.set(piece, False)
+        self._norm_len += len(piece)
+
+        for end, (phrase, entries) in self._phrase_iter:
+            start = end - len(phrase) + 1
+            for layer, category, _ in entries:
+                if layer != "aho":
+                    continue
+                if category == "direct":
+                    self._report(new, "aho", self._direct, {
+                        "type": "direct", "pattern": phrase, "span": (start, end),
+                    })
+                elif category == "verb":
+                    self._verb((self._hit_seq, phrase, start, end), new)
+                elif category == "object":
+                    self._object((self._hit_seq, phrase, start, end), new)
+            self._hit_seq += 1
+            self._prune(end)
+
+    def _verb(self, verb: tuple, new: list) -> None:
+        # hits are (seq, phrase, start, end); objects seen so far all end
+        # inside the verb's window, so only their start needs checking
+        win_lo = max(0, verb[2] - _WINDOW)
+        for obj in self._objects:
+            if obj[2] >= win_lo:
+                self._pair(verb, obj, new)
+        self._verbs.append(verb)
+
+    def _object(self, obj: tuple, new: list) -> None:
+        self._objects.append(obj)
+        for verb in self._verbs:
+            if obj[2] >= verb[2] - _WINDOW and obj[3] < verb[3] + _WINDOW:
+                self._pair(verb, obj, new)
+
+    def _pair(self, verb: tuple, obj: tuple, new: list) -> None:
+        finding = {"type": "proximity", "verb": verb[1], "object": obj[1],
+                   "span": (verb[2], verb[3]), "object_span": (obj[2], obj[3])}
+        self._proximity.append(((verb[0], obj[0]), finding))
+        new.append({"layer": "aho", **finding})
+
+    def _prune(self, end: int) -> None:
+        # any later verb starts at or after end - longest phrase + 1
+        horizon = end - engine.longest_phrase() - _WINDOW
+        if self._objects and self._objects[0][2] < horizon:
+            self._objects = [o for o in self._objects if o[2] >= horizon]
+        if self._verbs and self._verbs[0][3] + _WINDOW <= end:
+            self._verbs = [v for v in self._verbs if v[3] + _WINDOW > end]
+
+    def _structure(self, piece: str, new: list) -> None:
+        if len(self._structural_seen) == len(_STRUCTURAL_SET):
+            return
+        window = self._norm_tail + piece
+        base = self._norm_len - len(window)
+        for idx, m in _STRUCTURAL_SET.matches(window, window):
+            if idx in self._structural_seen:
+                continue
+            self._structural_seen.add(idx)
+            finding = {
+                "type":    "structural",
+                "pattern": _STRUCTURAL_SET.labels[idx],
+                "span":    (base + m.start(), base + m.end()),
+            }
+            self._structural.append((idx, finding))
+            new.append({"layer": "aho", **finding})
+        self._norm_tail = window[-CONTEXT_CHARS:]
+
+    def _raw_scan(self, chunk: str, final: bool, new: list) -> None:
+        window = self._raw + chunk
+        base = self._raw_base
+        n = len(window)
+        keep = max(0, n - CONTEXT_CHARS)
+
+        def open_ended(m: re.Match) -> bool:
+            # more input could still extend this match
+            return not final and m.end() == n and n - m.start() < TAIL_CHARS
+
+        for m in _TOKEN_PATTERN.finditer(window):
+            if base + m.start() < self._token_done:
+                continue
+            if open_ended(m):
+                keep = min(keep, m.start())
+                break
+            token = m.group()
+            finding = token_finding(token, shannon_entropy(token))
+            if finding:
+                self._report(new, "entropy", self._high_entropy, finding)
+            self._token_done = base + m.end()
+
+        for idx, m in _CREDENTIAL_PREFILTER.finditer(window):
+            start = base + m.start()
+            if start < self._cred_done.get(idx, 0):
+                continue
+            if open_ended(m):
+                keep = min(keep, m.start())
+                continue
+            self._cred_done[idx] = base + max(m.end(), m.start() + 1)
+            finding = {"type": CREDENTIAL_PATTERNS[idx][1], "severity": "critical"}
+            self._credentials.append((idx, start, finding))
+            new.append({"layer": "entropy", **finding})
+
+        self._raw = window[keep:]
+        self._raw_base = base + keep
+
+    @staticmethod
+    def _report(new: list, layer: str, bucket: list, finding: dict) -> None:
+        bucket.append(finding)
+        new.append({"layer": layer, **finding})
+
+    def _result(self) -> ScanResult:
+        matches = (self._direct
+                   + [f for _, f in sorted(self._proximity, key=lambda p: p[0])]
+                   + [f for _, f in sorted(self._structural, key=lambda p: p[0])])
+        if matches:
+            aho = LayerResult("aho_corasick", tuple(matches), "critical", key="matches")
+        else:
+            aho = LayerResult.clean("aho_corasick", "matches")
+
+        credentials = [f for _, _, f in sorted(self._credentials, key=lambda c: c[:2])]
+        findings = self._high_entropy + credentials
+        if findings:
+            entropy = LayerResult("entropy_credential", tuple(findings),
+                                  "critical" if credentials else "warning")
+        else:
+            entropy = LayerResult.clean("entropy_credential")
+
+        layer_ms = {name: round(ms, 3) for name, ms in self._layer_ms.items()}
+        return ScanResult(
+            self._preview,
+            {"aho": aho, "entropy": entropy},
+            layer_ms,
+            self.agent_id, self.source_agent_id, self.pipeline_position,
+            "default", "stream", (), False, (), {},
+            round(sum(self._layer_ms.values()), 3),
+        )
@@ -833,16 +833,31 @@ CREDENTIAL_PATTERNS = [
 #  COMPILED LOOKUP (optional performance helper)
 # ─────────────────────────────────────────────
 
-COMPILED_CREDENTIAL_PATTERNS = [
-    (re.compile(pattern), label)
-    for pattern, label in CREDENTIAL_PATTERNS
-]
+# compiled on first use, not at import: the detection layers have their
+# own prefiltered copies and most processes never touch this list
+_compiled_credentials = None
+
+
+def _compiled_credential_patterns() -> list:
+    global _compiled_credentials
+    if _compiled_credentials is None:
+        _compiled_credentials = [
+            (re.compile(pattern), label)
+            for pattern, label in CREDENTIAL_PATTERNS
+        ]
+    return _compiled_credentials
+
+
+def __getattr__(name):
+    if name == "COMPILED_CREDENTIAL_PATTERNS":
+        return _compiled_credential_patterns()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 def scan_text(text: str) -> list[dict]:
     """Return all credential matches found in *text*."""
     hits = []
-    for rx, label in COMPILED_CREDENTIAL_PATTERNS:
+    for rx, label in _compiled_credential_patterns():
         for m in rx.finditer(text):
             hits.append({"label": label, "match": m.group(), "span": m.span()})
     return hits
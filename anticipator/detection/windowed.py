@@ -0,0 +1,419 @@
+"""
+anticipator.detection.windowed
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+scan_file() — scan multi-megabyte documents, files and buffers in
+overlapping windows with bounded memory.
+
+    result = scan_file("/data/rag/context.txt")
+    result = scan_file(payload_bytes, executor="process")
+
+The input is memory-mapped (files) or viewed (buffers) and never decoded
+as a whole.  It is cut into *window*-byte segments; each segment is scanned
+together with the first *overlap* bytes of the next one:
+
+  - the overlap is derived from the signatures themselves — the widest
+    regex (see signature_reach()) or the phrase-proximity window, whichever
+    is larger — so a match that starts in a segment normally ends inside
+    its scanned window.  This is a heuristic bound, not a guarantee: an
+    unbounded repeat (\\s+, [^;]+) is assumed to span at most RUN_SLACK
+    characters, and regex widths are read with the interpreter's private
+    regex parser (FALLBACK_REACH is used if that is unavailable)
+  - cuts are placed on ASCII whitespace where possible (else on a UTF-8
+    character boundary), which keeps normalization identical to a scan of
+    the full text
+  - every finding is kept by exactly one window: positional findings
+    (aho "span", homoglyph "position") by where they start — a proximity
+    pair by its earlier end; findings
+    scan() reports once per message — every non-positional finding, and
+    one structural match per pattern — by the first window that reports
+    them; and the findings of COUNTED_LAYERS, reported per occurrence, by
+    discounting what a scan of the overlap alone reports, since the next
+    window sees that text too
+
+Merged findings carry offsets into the whole input — normalized-text spans
+(aho "span" and "object_span") and raw character positions are shifted by everything before their window —
+plus "window_offset", the byte offset of the window that found them.
+Homoglyph keyword matches are combined into the one finding scan() makes.
+
+Windows can be spread over the shared process pool (executor="process");
+at most two windows per worker are in flight at a time.  Stateful layers
+(canary, config_drift) have no input here and are skipped as in scan().
+The encoding layer's findings that quote the text it was given — its
+message-level finding and the URL-decoded message — are reported per
+window, and each window gets its own decode budget; its hex and base64
+payloads are reported once, as by scan().
+Matches longer than the overlap — huge encoded blobs, minified lines with
+no whitespace — may be seen only in part.
+"""
+
+import mmap
+import os
+import time
+from collections import Counter, deque
+from typing import Optional, Union
+
+try:
+    from re import _parser as _sre
+except ImportError:          # Python < 3.11
+    try:
+        import sre_parse as _sre
+    except ImportError:
+        _sre = None
+
+from anticipator.detection.core.normalizer import normalize
+from anticipator.detection.core.result import LayerResult, ScanResult, _rank
+from anticipator.detection.pool import get_pool, pool_workers
+
+# default bytes per window segment
+WINDOW_BYTES = 1 << 20
+# an unbounded repeat (\s+, [^;]+) counts as this many extra characters;
+# whitespace runs are collapsed before most layers see the text
+RUN_SLACK = 32
+# reach, in characters, assumed when regex widths cannot be measured
+FALLBACK_REACH = 4096
+# UTF-8 encodes a character in at most four bytes
+_MAX_CHAR_BYTES = 4
+_WHITESPACE_BYTES = b" \t\n\r\f\v"
+
+# layers that report a finding per occurrence rather than once per message
+COUNTED_LAYERS = frozenset({"entropy"})
+
+if _sre is not None:
+    _REPEATS = (_sre.MAX_REPEAT, _sre.MIN_REPEAT,
+                getattr(_sre, "POSSESSIVE_REPEAT", _sre.MAX_REPEAT))
+    _ZERO_WIDTH = (_sre.AT, _sre.ASSERT, _sre.ASSERT_NOT)
+
+_reach = 0
+
+
+def _width(items) -> int:
+    """Longest match, in characters, of a parsed regex, counting each
+    unbounded repeat as RUN_SLACK extra characters."""
+    total = 0
+    for op, av in items:
+        if op in _REPEATS:
+            lo, hi, sub = av
+            w = _width(sub)
+            total += w * hi if hi != _sre.MAXREPEAT else w * max(lo, 1) + RUN_SLACK
+        elif op is _sre.SUBPATTERN:
+            total += _width(av[-1])
+        elif op is _sre.BRANCH:
+            total += max(_width(branch) for branch in av[1])
+        elif op not in _ZERO_WIDTH:
+            total += 1
+    return total
+
+
+def regex_width(rx) -> int:
+    """Estimated widest match of compiled regex *rx* (see _width)."""
+    try:
+        return _width(_sre.parse(rx.pattern, rx.flags))
+    except Exception:           # no parser, or its internals changed
+        return FALLBACK_REACH
+
+
+def signature_reach() -> int:
+    """Estimated widest span, in characters, any built-in signature can
+    match — a heuristic bound (see the module docstring)."""
+    global _reach
+    if not _reach:
+        from anticipator.detection.core import aho, engine, entropy
+        from anticipator.detection.extended import path_traversal, threat_categories, tool_alias
+
+        patterns = (list(aho._STRUCTURAL_SET.patterns)
+                    + [rx for rx, _ in threat_categories._NOISE_PATTERNS]
+                    + list(path_traversal._REGEX_SET.patterns)
+                    + list(tool_alias._BYPASS_SET.patterns)
+                    + [rx for rx, _ in entropy._CREDENTIAL_PREFILTER.compiled])
+        widest = max(regex_width(rx) for rx in patterns)
+        _reach = max(widest, engine.longest_phrase() + 2 * aho._WINDOW)
+    return _reach
+
+
+def _open(source):
+    """Return (buffer, closer) for a path or a bytes-like object."""
+    if isinstance(source, (str, os.PathLike)):
+        f = open(source, "rb")
+        if os.fstat(f.fileno()).st_size == 0:
+            return b"", f.close
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        def close():
+            mm.close()
+            f.close()
+        return mm, close
+    return memoryview(source).cast("B"), lambda: None
+
+
+def _cut(buf, pos: int, limit: int) -> int:
+    """First safe cut at or after *pos*: ASCII whitespace within *limit*
+    bytes, else the next UTF-8 character boundary."""
+    n = len(buf)
+    if pos >= n:
+        return n
+    end = min(n, pos + limit)
+    for i in range(pos, end):
+        if buf[i] in _WHITESPACE_BYTES:
+            return i
+    while pos < n and 0x80 <= buf[pos] < 0xC0:
+        pos += 1
+    return pos
+
+
+def _segments(buf, window: int, overlap: int):
+    """Yield (start, owned_end, scan_end) for every window."""
+    n = len(buf)
+    start = 0
+    while start < n:
+        owned_end = _cut(buf, start + max(window - overlap, 1), overlap)
+        scan_end = _cut(buf, owned_end + overlap, overlap) if owned_end < n else n
+        yield start, owned_end, scan_end
+        start = owned_end
+
+
+def _decode(data) -> str:
+    return bytes(data).decode("utf-8", errors="replace")
+
+
+def _scan_window(data, split: int, last: bool, agent_id: str, agent_type: str,
+                 mode: str, min_severity: Optional[str]) -> dict:
+    """Scan one window and keep only the findings it owns.
+
+    *data* is the window's bytes (or (path, start, end) to read them from a
+    file); bytes before *split* are the window's own segment, the rest is
+    overlap shared with the next window."""
+    from anticipator.detection.scanner import scan
+
+    if isinstance(data, tuple):
+        path, start, end = data
+        with open(path, "rb") as f:
+            f.seek(start)
+            data = f.read(end - start)
+    owned, tail = _decode(data[:split]), _decode(data[split:])
+
+    result = scan(owned + tail, agent_id=agent_id, agent_type=agent_type,
+                  mode=mode, min_severity=min_severity)
+    norm_len = len(normalize(owned))
+
+    tail_counts = None
+    layers = {}
+    for name, r in result.layers.items():
+        if not r.detected:
+            layers[name] = (r.layer, r.key, "none", (), r.extra)
+            continue
+        kept = []
+        for finding in r.findings:
+            if "span" in finding:
+                # a proximity pair belongs where its earlier end starts;
+                # the overlap always reaches the other end
+                start = finding["span"][0]
+                if "object_span" in finding:
+                    start = min(start, finding["object_span"][0])
+                if last or start < norm_len:
+                    kept.append(finding)
+            elif "position" in finding:
+                if last or finding["position"] < len(owned):
+                    kept.append(finding)
+            else:
+                kept.append(finding)
+
+        if (name in COUNTED_LAYERS and not last and tail
+                and any(_finding_key(f) is not None for f in kept)):
+            if tail_counts is None:
+                tail_counts = _finding_counts(scan(tail, agent_id=agent_id, agent_type=agent_type,
+                                                   mode=mode, min_severity=min_severity))
+            seen = tail_counts.get(name)
+            if seen:
+                # the next window reports these again — drop the last ones here
+                for i in range(len(kept) - 1, -1, -1):
+                    key = _finding_key(kept[i])
+                    if key is not None and seen[key] > 0:
+                        seen[key] -= 1
+                        del kept[i]
+
+        severity = r.severity if kept or not r.findings else "none"
+        layers[name] = (r.layer, r.key, severity, tuple(kept), r.extra)
+
+    return {
+        "layers": layers,
+        "layer_ms": result.layer_ms,
+        "norm_len": norm_len,
+        "chars": len(owned),
+        "leading_space": owned[:1].isspace(),
+        "preview": (owned + tail)[:100],
+    }
+
+
+def _finding_key(finding) -> Optional[str]:
+    if "span" in finding or "position" in finding:
+        return None
+    return repr(sorted(finding.items()))
+
+
+def _once_key(finding):
+    """Key under which scan() reports *finding* at most once per message,
+    or None when every occurrence is reported."""
+    if finding.get("type") == "structural":
+        return "structural", finding["pattern"]
+    return _finding_key(finding)
+
+
+def _finding_counts(result) -> dict:
+    counts = {}
+    for name, r in result.layers.items():
+        if r.detected and name in COUNTED_LAYERS:
+            c = Counter(_finding_key(f) for f in r.findings)
+            c.pop(None, None)
+            counts[name] = c
+    return counts
+
+
+def _shift(finding, window_offset: int, norm_base: int, char_base: int) -> dict:
+    finding = dict(finding)
+    for key in ("span", "object_span"):
+        if key in finding:
+            start, end = finding[key]
+            finding[key] = (start + norm_base, end + norm_base)
+    if "position" in finding:
+        finding["position"] += char_base
+    finding["window_offset"] = window_offset
+    return finding
+
+
+def scan_file(
+    source: Union[str, "os.PathLike", bytes, bytearray, memoryview],
+    agent_id: str = "unknown",
+    agent_type: str = "default",
+    mode: str = "full",
+    min_severity: str = None,
+    window: int = WINDOW_BYTES,
+    executor: str = None,
+    workers: int = None,
+) -> ScanResult:
+    """Scan a file (by path) or a UTF-8 buffer in overlapping windows.
+
+    executor=None scans windows one after another in this process;
+    executor="process" spreads them over the shared process pool."""
+    if executor not in (None, "process"):
+        raise ValueError(f"unknown executor {executor!r}; expected None or 'process'")
+    start_total = time.perf_counter()
+    overlap = signature_reach() * _MAX_CHAR_BYTES
+    window = max(window, 2 * overlap)
+
+    buf, close = _open(source)
+    try:
+        if not len(buf):
+            from anticipator.detection.scanner import scan
+            return scan("", agent_id=agent_id, agent_type=agent_type,
+                        mode=mode, min_severity=min_severity)
+
+        path = os.fspath(source) if isinstance(source, (str, os.PathLike)) else None
+        segments = list(_segments(buf, window, overlap))
+
+        def task(i):
+            start, owned_end, scan_end = segments[i]
+            if executor == "process" and path is not None:
+                data = (path, start, scan_end)      # workers read it themselves
+            else:
+                data = bytes(buf[start:scan_end])
+            return (data, owned_end - start, i == len(segments) - 1,
+                    agent_id, agent_type, mode, min_severity)
+
+        if executor == "process":
+            results = _pooled(task, len(segments), workers)
+        else:
+            results = (_scan_window(*task(i)) for i in range(len(segments)))
+
+        return _merge(results, segments, agent_id, agent_type, mode, start_total)
+    finally:
+        close()
+
+
+def _pooled(task, count: int, workers: Optional[int]):
+    """Yield window results in order, keeping at most two per worker queued."""
+    workers = pool_workers(workers)
+    pool = get_pool(workers)
+    pending = deque()
+    next_i = 0
+    try:
+        while next_i < count or pending:
+            while next_i < count and len(pending) < 2 * workers:
+                pending.append(pool.submit(_scan_window, *task(next_i)))
+                next_i += 1
+            yield pending.popleft().result()
+    finally:
+        for future in pending:
+            future.cancel()
+
+
+def _combine_homoglyph(findings: list) -> list:
+    """scan() lists every keyword the folded text reveals in one finding
+    and rates every lookalike critical once there is one."""
+    matches = [f for f in findings if f["type"] == "homoglyph_keyword_match"]
+    if not matches:
+        return findings
+    from anticipator.detection.extended.homoglyph import SUSPICIOUS_KEYWORDS
+
+    revealed = {k for f in matches for k in f["keywords"]}
+    combined = [dict(f, severity="critical") if f["type"] == "homoglyph" else f
+                for f in findings if f["type"] != "homoglyph_keyword_match"]
+    combined.append({**matches[0], "keywords": [k for k in SUSPICIOUS_KEYWORDS if k in revealed]})
+    return combined
+
+
+def _merge(results, segments, agent_id: str, agent_type: str, mode: str,
+           start_total: float) -> ScanResult:
+    merged: dict = {}
+    reported: dict = {}         # layer → once-per-message keys already kept
+    layer_ms: dict = {}
+    preview = ""
+    norm_pos = char_base = 0
+
+    for (start, _, _), window in zip(segments, results):
+        if not preview:
+            preview = window["preview"]
+        # a segment cut on whitespace joins the previous one with one space
+        norm_base = norm_pos + (1 if norm_pos and window["leading_space"] else 0)
+
+        for name, (label, key, severity, findings, extra) in window["layers"].items():
+            entry = merged.get(name)
+            if entry is None:
+                entry = merged[name] = [label, key, "none", [], extra]
+            elif entry[4] is None:
+                entry[4] = extra
+            if _rank(severity) > _rank(entry[2]):
+                entry[2] = severity
+            if name not in COUNTED_LAYERS:
+                seen = reported.setdefault(name, set())
+                kept = []
+                for f in findings:
+                    once = _once_key(f)
+                    if once is None or once not in seen:
+                        seen.add(once)
+                        kept.append(f)
+                findings = kept
+            entry[3].extend(_shift(f, start, norm_base, char_base) for f in findings)
+
+        for name, ms in window["layer_ms"].items():
+            layer_ms[name] = layer_ms.get(name, 0.0) + ms
+        if window["norm_len"]:
+            norm_pos = norm_base + window["norm_len"]
+        char_base += window["chars"]
+
+    layers = {}
+    for name, (label, key, severity, findings, extra) in merged.items():
+        if name == "homoglyph":
+            findings = _combine_homoglyph(findings)
+        if not findings and severity == "none" and extra is None:
+            layers[name] = LayerResult.clean(label, key)
+        else:
+            layers[name] = LayerResult(label, tuple(findings), severity,
+                                       detected=bool(findings) or severity != "none",
+                                       key=key, extra=extra)
+
+    total_ms = (time.perf_counter() - start_total) * 1000
+    return ScanResult(
+        preview, layers, {name: round(ms, 3) for name, ms in layer_ms.items()},
+        agent_id, None, 0, agent_type, mode, (), False, (), {},
+        round(total_ms, 3),
+    )
@@ -3,20 +3,24 @@ from __future__ import annotations
 from typing import Any
 
 
-def observe(graph: Any, name: str = "anticipator") -> Any:
+def observe(graph: Any, name: str = "anticipator", *, canaries: bool = False) -> Any:
+    """Wrap *graph* with Anticipator threat detection.
+
+    Canary injection is off by default; see the langgraph integration
+    for what canaries=True changes in the state each node receives."""
 
     try:
         from langgraph.graph import StateGraph                      
         from langgraph.graph.state import CompiledStateGraph        
         if isinstance(graph, (StateGraph, CompiledStateGraph)):
             from anticipator.integrations.langgraph.wrapper import observe as lg_observe
-            return lg_observe(graph, name)
+            return lg_observe(graph, name, canaries=canaries)
     except ImportError:
         pass 
     
     try:
         from anticipator.integrations.langgraph.wrapper import observe as lg_observe
-        return lg_observe(graph, name)
+        return lg_observe(graph, name, canaries=canaries)
     except ImportError as exc:
         raise ImportError(
             f"No integration available for graph type {type(graph).__name__!r}. "
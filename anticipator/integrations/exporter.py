@@ -1,6 +1,7 @@
 import hashlib
 import json
 import os
+from collections.abc import Mapping
 from datetime import datetime
 from pathlib import Path
 from typing import List, Optional
@@ -34,7 +35,7 @@ def export_json(
             layers_hit = [
                 layer
                 for layer, result in t["scan"].get("layers", {}).items()
-                if isinstance(result, dict) and result.get("detected")
+                if isinstance(result, Mapping) and result.get("detected")
             ]
             grouped[key] = {
                 "nodes":      [],
@@ -75,7 +76,7 @@ def export_json(
                 "layers_hit": [
                     layer
                     for layer, result in r["scan"].get("layers", {}).items()
-                    if isinstance(result, dict) and result.get("detected")
+                    if isinstance(result, Mapping) and result.get("detected")
                 ],
             }
             for r in log
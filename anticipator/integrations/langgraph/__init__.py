@@ -30,6 +30,14 @@ interceptor that:
   - Logs detections to an in-memory list AND a persistent SQLite store
   - Prints a coloured console alert for critical/high findings
   - Passes the state through unchanged — smoke-detector mode, never blocks
+
+Canary injection is opt-in.  observe(graph, name, canaries=True)
+additionally hands each node a copy of its state with a canary — an
+HTML comment — appended to the text field; a canary that turns up in a
+later node's input is reported by the canary layer as a leak from the
+node it was planted in.  Nodes and the models they prompt see the
+appended comment, so leave canaries off where that text must reach them
+verbatim.  app.release_canaries() retires the graph's canaries.
 """
 
 from .wrapper import ObservableGraph, observe
@@ -1,9 +1,11 @@
 import time
 import threading
 import functools
+from collections.abc import Mapping
 from typing import Callable, Any
 
 from anticipator.integrations.monitor import write_scan, write_delegation
+from anticipator.detection.core.canary import inject_canary
 from anticipator.detection.scanner import scan
 
 _message_log: list  = []
@@ -14,6 +16,10 @@ RESET  = "\033[0m";  BOLD   = "\033[1m";  DIM    = "\033[2m"
 RED    = "\033[91m"; YELLOW = "\033[93m"; GREEN  = "\033[92m"
 CYAN   = "\033[96m"; WHITE  = "\033[97m"; BG_RED = "\033[41m"
 
+# state keys read as the node's text, in order of preference
+_TEXT_KEYS = ("user_query", "input", "query", "content",
+              "text", "output", "draft", "final_report")
+
 
 def get_message_log() -> list:
     with _log_lock:
@@ -33,8 +39,7 @@ def _extract_text(state: Any) -> str:
         return state
 
     if isinstance(state, dict):
-        for key in ("user_query", "input", "query", "content",
-                    "text", "output", "draft", "final_report"):
+        for key in _TEXT_KEYS:
             val = state.get(key)
             if val and isinstance(val, str):
                 return val
@@ -57,7 +62,21 @@ def _extract_text(state: Any) -> str:
 
 
 
-def wrap_node(node_name: str, fn: Callable, graph_name: str = "unknown") -> Callable:
+def _with_canary(state: Any, node_name: str, graph_name: str) -> Any:
+    """Return a shallow copy of a dict *state* with a fresh canary for the
+    node appended to its text field.  The shared state is never touched,
+    so only text the node itself passes on carries the canary — and a
+    later node seeing it means this node leaked its input."""
+    if isinstance(state, dict):
+        for key in _TEXT_KEYS:
+            val = state.get(key)
+            if val and isinstance(val, str):
+                return {**state, key: inject_canary(val, node_name, scope=graph_name)}
+    return state
+
+
+def wrap_node(node_name: str, fn: Callable, graph_name: str = "unknown",
+              canaries: bool = False) -> Callable:
 
     @functools.wraps(fn)
     def intercepted(state: Any) -> Any:
@@ -90,7 +109,7 @@ def wrap_node(node_name: str, fn: Callable, graph_name: str = "unknown") -> Call
             col = f"{BG_RED}{WHITE}{BOLD}" if sev == "critical" else f"{YELLOW}{BOLD}"
             layers_hit = ", ".join(
                 k for k, v in scan_result.get("layers", {}).items()
-                if isinstance(v, dict) and v.get("detected")
+                if isinstance(v, Mapping) and v.get("detected")
             )
             print(
                 f"{col}[ANTICIPATOR] {sev.upper()} in '{node_name}'"
@@ -98,6 +117,8 @@ def wrap_node(node_name: str, fn: Callable, graph_name: str = "unknown") -> Call
                 f"  preview={text[:60]!r}"
             )
 
+        if canaries:
+            return fn(_with_canary(state, node_name, graph_name))
         return fn(state)
 
     intercepted.__wrapped_node__ = node_name
@@ -6,6 +6,7 @@ from anticipator.integrations.langgraph.interceptor import (
     get_message_log,
     clear_message_log,
 )
+from anticipator.detection.core.canary import release_canaries
 from anticipator.integrations.exporter import export_json
 from anticipator.integrations.monitor import print_summary, query as db_query
 
@@ -24,7 +25,7 @@ def _sev_color(s: str) -> str:
 
 
 
-def _patch_graph(graph, name: str) -> int:
+def _patch_graph(graph, name: str, canaries: bool = False) -> int:
 
     patched = 0
     nodes = getattr(graph, "nodes", None)
@@ -38,14 +39,14 @@ def _patch_graph(graph, name: str) -> int:
         if hasattr(spec, "runnable") and hasattr(spec.runnable, "func"):
             fn = spec.runnable.func
             if not getattr(fn, "__wrapped_node__", False):
-                spec.runnable.func = wrap_node(node_name, fn, name)
+                spec.runnable.func = wrap_node(node_name, fn, name, canaries)
                 patched += 1
             continue
 
         if callable(spec):
             if not getattr(spec, "__wrapped_node__", False):
                 try:
-                    nodes[node_name] = wrap_node(node_name, spec, name)
+                    nodes[node_name] = wrap_node(node_name, spec, name, canaries)
                     patched += 1
                 except (TypeError, AttributeError):
                     warnings.warn(
@@ -84,14 +85,18 @@ class _AnticipatorMixin:
     def export_report(self, path: str = None) -> str:
         return export_json(log=get_message_log(), name=self._name, path=path)
 
+    def release_canaries(self) -> int:
+        """Retire every canary this graph's nodes were given."""
+        return release_canaries(self._name)
+
 
 
 class ObservableGraph(_AnticipatorMixin):
 
-    def __init__(self, graph, name: str = "langgraph"):
+    def __init__(self, graph, name: str = "langgraph", *, canaries: bool = False):
         self._graph = graph
         self._name  = name
-        patched = _patch_graph(graph, name)
+        patched = _patch_graph(graph, name, canaries)
         _print_banner(name, patched)
 
     def compile(self, **kwargs) -> "_CompiledGraph":
@@ -190,6 +195,12 @@ def _print_report(name: str) -> None:
 
 
 
-def observe(graph, name: str = "langgraph") -> ObservableGraph:
-    """Wrap a LangGraph StateGraph with Anticipator threat detection."""
-    return ObservableGraph(graph, name)
\ No newline at end of file
+def observe(graph, name: str = "langgraph", *, canaries: bool = False) -> ObservableGraph:
+    """Wrap a LangGraph StateGraph with Anticipator threat detection.
+
+    Nodes receive their state unchanged unless canaries=True (opt-in).
+    Then each node runs on a copy of its state whose text field ends in a
+    fresh canary scoped to *name* — an HTML comment the node, and any
+    model it prompts, will see — and the canary layer flags any later node
+    whose input carries it."""
+    return ObservableGraph(graph, name, canaries=canaries)
\ No newline at end of file
@@ -12,6 +12,11 @@ DB_PATH = os.path.join(os.path.expanduser("~"), ".anticipator", "anticipator.db"
 
 
 
+# DB_PATH whose schema this process has created; the database is only
+# touched on first use, never at import
+_schema_ready: Optional[str] = None
+
+
 @contextmanager
 def _connect() -> Generator[sqlite3.Connection, None, None]:
 
@@ -22,6 +27,8 @@ def _connect() -> Generator[sqlite3.Connection, None, None]:
     conn.execute("PRAGMA journal_mode=WAL")
     conn.execute("PRAGMA synchronous=NORMAL")   # safe + faster than FULL
     try:
+        if _schema_ready != DB_PATH:
+            _create_schema(conn)
         yield conn
         conn.commit()
     except Exception:
@@ -31,59 +38,67 @@ def _connect() -> Generator[sqlite3.Connection, None, None]:
         conn.close()
 
 
+def _create_schema(conn: sqlite3.Connection) -> None:
+    global _schema_ready
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS scans (
+            id            INTEGER PRIMARY KEY AUTOINCREMENT,
+            timestamp     TEXT    NOT NULL,
+            framework     TEXT    NOT NULL,
+            graph         TEXT    NOT NULL,
+            node          TEXT    NOT NULL,
+            severity      TEXT    NOT NULL,
+            detected      INTEGER NOT NULL,
+            input_preview TEXT    NOT NULL,
+            scan_json     TEXT    NOT NULL
+        )
+    """)
+
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS delegations (
+            id        INTEGER PRIMARY KEY AUTOINCREMENT,
+            timestamp TEXT NOT NULL,
+            framework TEXT NOT NULL,
+            graph     TEXT NOT NULL,
+            from_node TEXT NOT NULL,
+            to_node   TEXT NOT NULL
+        )
+    """)
+
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_scans_timestamp"
+        " ON scans(timestamp)"
+    )
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_scans_framework"
+        " ON scans(framework)"
+    )
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_scans_graph"
+        " ON scans(graph)"
+    )
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_scans_severity"
+        " ON scans(severity)"
+    )
+    conn.commit()
+    _schema_ready = DB_PATH
+
+
 def init_db() -> None:
-    """Create tables and indexes if they don't already exist."""
+    """Create tables and indexes if they don't already exist.  Optional:
+    the first read or write does it too."""
     try:
-        with _connect() as conn:
-            conn.execute("""
-                CREATE TABLE IF NOT EXISTS scans (
-                    id            INTEGER PRIMARY KEY AUTOINCREMENT,
-                    timestamp     TEXT    NOT NULL,
-                    framework     TEXT    NOT NULL,
-                    graph         TEXT    NOT NULL,
-                    node          TEXT    NOT NULL,
-                    severity      TEXT    NOT NULL,
-                    detected      INTEGER NOT NULL,
-                    input_preview TEXT    NOT NULL,
-                    scan_json     TEXT    NOT NULL
-                )
-            """)
-
-            conn.execute("""
-                CREATE TABLE IF NOT EXISTS delegations (
-                    id        INTEGER PRIMARY KEY AUTOINCREMENT,
-                    timestamp TEXT NOT NULL,
-                    framework TEXT NOT NULL,
-                    graph     TEXT NOT NULL,
-                    from_node TEXT NOT NULL,
-                    to_node   TEXT NOT NULL
-                )
-            """)
-
-            conn.execute(
-                "CREATE INDEX IF NOT EXISTS idx_scans_timestamp"
-                " ON scans(timestamp)"
-            )
-            conn.execute(
-                "CREATE INDEX IF NOT EXISTS idx_scans_framework"
-                " ON scans(framework)"
-            )
-            conn.execute(
-                "CREATE INDEX IF NOT EXISTS idx_scans_graph"
-                " ON scans(graph)"
-            )
-            conn.execute(
-                "CREATE INDEX IF NOT EXISTS idx_scans_severity"
-                " ON scans(severity)"
-            )
+        with _connect():
+            pass
     except Exception as exc:
         log.error("[ANTICIPATOR] init_db failed: %s", exc)
 
 
-try:
-    init_db()
-except Exception as _init_exc:
-    log.warning("[ANTICIPATOR] Could not initialise DB at import: %s", _init_exc)
+def _plain(scan_result) -> dict:
+    """ScanResult objects serialize through to_dict(); plain dicts as-is."""
+    to_dict = getattr(scan_result, "to_dict", None)
+    return to_dict() if to_dict is not None else scan_result
 
 
 def write_scan(
@@ -109,7 +124,7 @@ def write_scan(
                 scan_result.get("severity", "none"),
                 1 if scan_result.get("detected") else 0,
                 input_preview[:200],
-                json.dumps(scan_result),
+                json.dumps(_plain(scan_result)),
             ),
         )
 
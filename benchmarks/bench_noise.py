@@ -0,0 +1,62 @@
+"""
+Noise-obscured rules on adversarial input: regex vs. AnchorChain.
+
+Each threat_categories noise rule is timed as its original regex and as the
+anchor chain that replaced it, on inputs built to maximise the regex's
+backtracking — dense keyword repetition with no completing payload — at
+growing lengths.  Both must agree on every input.  The chain's time should
+grow linearly with length; the regex's grows with keyword density as well.
+
+    python benchmarks/bench_noise.py [--max-kb N]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from anticipator.detection.extended import threat_categories                 # noqa: E402
+
+# a repeating unit per rule that keeps the regex searching without a match
+ADVERSARIAL = {
+    "innocent_wrapper_malicious_core": "weather ",
+    "helpful_request_with_bypass":     "help me with ",
+    "authority_claim_before_attack":   "approved ",
+    "numbered_question_injection":     "question 1 ",
+    "role_coercion":                   "as a b ",
+    "encoded_instruction":             "decode      ",
+    "three_part_noise_injection":      "what ",
+}
+
+
+def _time(fn, text) -> float:
+    start = time.perf_counter()
+    result = fn(text)
+    return (time.perf_counter() - start) * 1000, result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--max-kb", type=int, default=16)
+    args = parser.parse_args()
+
+    rules = zip(threat_categories._NOISE_PATTERNS, threat_categories._NOISE_CHAINS.chains)
+    sizes = [1]
+    while sizes[-1] * 2 <= args.max_kb:
+        sizes.append(sizes[-1] * 2)
+
+    print(f"{'rule':<32} {'KB':>4} {'regex ms':>10} {'chain ms':>10} {'speedup':>8}")
+    for (rx, label), chain in rules:
+        unit = ADVERSARIAL[label]
+        for kb in sizes:
+            text = unit * (kb * 1024 // len(unit))
+            old, expected = _time(lambda t: rx.search(t) is not None, text)
+            new, got = _time(chain.search, text)
+            assert got == expected, (label, kb)
+            print(f"{label:<32} {kb:>4} {old:>10.2f} {new:>10.2f} {old / max(new, 1e-6):>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
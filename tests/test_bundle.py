@@ -0,0 +1,59 @@
+import os
+import pickle
+import stat
+
+import pytest
+
+from anticipator.detection.core import bundle
+
+FORGED = {"phrases": "forged", "credentials": "forged"}
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    directory = tmp_path / "cache"
+    monkeypatch.setenv("ANTICIPATOR_CACHE_DIR", str(directory))
+    monkeypatch.setattr(bundle, "_bundle", None)
+    return directory
+
+
+def _plant(path, mode):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        pickle.dump(FORGED, f)
+    os.chmod(path, mode)
+
+
+def test_cache_dir_is_private_and_a_stale_hash_rebuilds(cache, monkeypatch):
+    first = bundle.build()
+    assert stat.S_IMODE(os.stat(cache).st_mode) == 0o700
+
+    monkeypatch.setattr(bundle, "_bundle", None)
+    monkeypatch.setattr(bundle, "source_hash", lambda: "0" * 32)
+    loaded = bundle.load()
+    second = bundle.bundle_path()
+
+    assert second != first and os.path.exists(first) and os.path.exists(second)
+    assert set(loaded) == {"phrases", "credentials"}
+
+
+def test_an_owned_private_bundle_is_loaded(cache):
+    _plant(bundle.bundle_path(), 0o600)
+    assert bundle.load() == FORGED
+
+
+@pytest.mark.skipif(not hasattr(os, "getuid"), reason="POSIX ownership")
+@pytest.mark.parametrize("foreign", ["group_writable", "world_writable", "other_owner"])
+def test_a_foreign_or_writable_bundle_is_not_unpickled(cache, monkeypatch, foreign):
+    path = bundle.bundle_path()
+    mode = {"group_writable": 0o620, "world_writable": 0o606}.get(foreign, 0o600)
+    _plant(path, mode)
+    if foreign == "other_owner":
+        uid = os.getuid()
+        monkeypatch.setattr(os, "getuid", lambda: uid + 1)
+
+    loaded = bundle.load()
+
+    assert loaded != FORGED and set(loaded) == {"phrases", "credentials"}
+    with open(path, "rb") as f:
+        assert pickle.load(f) == FORGED         # left alone, not replaced
@@ -0,0 +1,77 @@
+import time
+
+import pytest
+
+from anticipator.detection import scanner
+from anticipator.detection.core import canary
+from anticipator.detection.extended import config_drift
+
+TEXT = "Please summarise the quarterly report for the board."
+CONFIG = {"agent_id": "writer", "model": "small", "tools": {"deny": ["shell"]}}
+
+
+@pytest.fixture(autouse=True)
+def cache(monkeypatch):
+    monkeypatch.setattr(canary, "_store", canary.CanaryStore())
+    monkeypatch.setattr(config_drift, "_baselines", {})
+    scanner.enable_cache(maxsize=2)
+    yield
+    scanner.disable_cache()
+
+
+def test_canary_runs_live_on_a_cache_hit():
+    token = canary.generate_canary("planner", scope="run")
+    text = f"{TEXT} <!-- {token} -->"
+
+    # the owner reading its own canary is no leak
+    first = scanner.scan(text, agent_id="planner", source_agent_id="planner")
+    assert not first.cache_hit and not first.layers["canary"].detected
+
+    leaked = scanner.scan(text, agent_id="writer", source_agent_id="planner")
+    assert leaked.cache_hit and "aho" in leaked.cached_layers
+    assert "canary" not in leaked.cached_layers
+    assert leaked.layers["canary"].detected
+
+    canary.release_canaries("run")
+    released = scanner.scan(text, agent_id="writer", source_agent_id="planner")
+    assert released.cache_hit and not released.layers["canary"].detected
+
+
+def test_config_drift_runs_live_on_a_cache_hit():
+    config_drift.set_baseline(CONFIG)
+
+    first = scanner.scan(TEXT, agent_type="openclaw", current_config=CONFIG)
+    assert not first.cache_hit and not first.layers["config_drift"].detected
+
+    drifted = scanner.scan(TEXT, agent_type="openclaw",
+                           current_config=dict(CONFIG, model="large"))
+    assert drifted.cache_hit and "config_drift" not in drifted.cached_layers
+    assert drifted.layers["config_drift"].severity == "high"
+
+
+def test_ttl_expiry_is_counted():
+    scanner.enable_cache(maxsize=2, ttl=0.05)
+
+    scanner.scan(TEXT)
+    assert scanner.scan(TEXT).cache_hit
+    time.sleep(0.06)
+    assert not scanner.scan(TEXT).cache_hit
+
+    stats = scanner.cache_stats()
+    assert (stats["hits"], stats["misses"], stats["expirations"]) == (1, 2, 1)
+    assert stats["size"] == 1
+
+
+def test_lru_eviction_is_counted():
+    a, b, c = TEXT, TEXT + " a", TEXT + " b"
+    scanner.scan(a)
+    scanner.scan(b)
+    scanner.scan(a)            # a is now the most recently used
+    scanner.scan(c)            # evicts b
+
+    stats = scanner.cache_stats()
+    assert (stats["hits"], stats["misses"], stats["evictions"]) == (1, 3, 1)
+    assert stats["size"] == 2
+    assert scanner.scan(a).cache_hit
+    assert not scanner.scan(b).cache_hit
+    assert scanner.cache_stats()["evictions"] == 2
@@ -0,0 +1,79 @@
+import copy
+
+import pytest
+
+from anticipator.detection.extended import config_drift
+
+CONFIG = {
+    "agent_id": "writer",
+    "workspace": "/srv/agents/writer",
+    "model": "small",
+    "sandbox": {"mode": "strict", "paths": ["/tmp", "/srv"]},
+    "tools": {"deny": ["shell", "network"], "limits": {"calls": 10}},
+}
+
+
+@pytest.fixture(autouse=True)
+def baselines(monkeypatch):
+    monkeypatch.setattr(config_drift, "_baselines", {})
+
+
+def _reordered(value):
+    if isinstance(value, dict):
+        return {k: _reordered(value[k]) for k in reversed(list(value))}
+    return value
+
+
+def test_an_unchanged_config_takes_the_fingerprint_fast_path(monkeypatch):
+    config_drift.set_baseline(CONFIG, agent_id="writer")
+
+    def no_slow_path(*args):
+        raise AssertionError("subtree comparison ran for an unchanged config")
+
+    monkeypatch.setattr(config_drift, "_changed", no_slow_path)
+    result = config_drift.detect(copy.deepcopy(CONFIG), agent_id="writer")
+    assert not result.detected and result.severity == "none"
+
+
+def test_agents_without_a_baseline_fall_back_to_the_default():
+    config_drift.set_baseline(CONFIG)
+    config_drift.set_baseline(dict(CONFIG, model="large"), agent_id="reviewer")
+
+    drifted = dict(CONFIG, workspace="/")
+    result = config_drift.detect(drifted, agent_id="someone-else")
+    assert result.severity == "critical"
+    assert {(f["type"], f["key"]) for f in result.findings} == {
+        ("immutable_key_changed", "workspace")}
+
+    # an agent's own baseline wins over the default
+    assert not config_drift.detect(dict(CONFIG, model="large"), agent_id="reviewer").detected
+    assert config_drift.detect(dict(CONFIG, model="large"), agent_id="writer").detected
+
+
+def test_clear_baseline_removes_one_agent_then_the_default():
+    config_drift.set_baseline(CONFIG)
+    config_drift.set_baseline(dict(CONFIG, model="large"), agent_id="reviewer")
+
+    config_drift.clear_baseline("reviewer")
+    result = config_drift.detect(dict(CONFIG, model="large"), agent_id="reviewer")
+    assert [f["key"] for f in result.findings] == ["model"]
+
+    config_drift.clear_baseline()
+    result = config_drift.detect(CONFIG, agent_id="reviewer")
+    assert not result.detected and "note" in result
+
+
+def test_reordered_keys_take_the_slow_path_to_the_same_verdict():
+    config_drift.set_baseline(CONFIG)
+    reordered = _reordered(CONFIG)
+    assert config_drift._fingerprint(reordered) != config_drift._fingerprint(CONFIG)
+
+    assert not config_drift.detect(reordered).detected
+
+    drifted = copy.deepcopy(CONFIG)
+    drifted["tools"]["deny"] = ["network"]
+    drifted["tools"]["allow"] = ["shell"]
+    expected = config_drift.detect(drifted)
+    got = config_drift.detect(_reordered(drifted))
+    assert got.severity == expected.severity == "critical"
+    assert sorted(got.findings, key=repr) == sorted(expected.findings, key=repr)
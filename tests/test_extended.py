@@ -0,0 +1,50 @@
+import random
+
+from anticipator.detection.extended import path_traversal, threat_categories
+
+
+def test_threat_phrases_match_the_lowercased_text():
+    assert threat_categories.detect("sudo su")["severity"] == "critical"
+    # normalization would fold the newline into a space; the phrase match must not
+    assert threat_categories.detect("sudo\nsu")["severity"] == "none"
+
+
+def test_forbidden_literals_match_case_insensitively():
+    assert path_traversal.detect("cat /ETC/PASSWD")["severity"] == "critical"
+    # U+017F LATIN SMALL LETTER LONG S matches "s" under IGNORECASE
+    assert path_traversal.detect("cat /etc/paſſwd")["severity"] == "critical"
+
+
+# keyword-dense fragments that keep the noise regexes searching, and the
+# payloads that complete them; "ſ" and "K" (Kelvin) fold to ASCII under
+# IGNORECASE and must not be lost by the chains' literal gate
+NOISE_WORDS = [
+    "weather ", "help me with ", "approved ", "question 1 ", "as a b ",
+    "decode      ", "what ", "how ", "also ", "and ", "you must ", "follow ",
+    "bypaſs ", "inject ", "ignore ", "reveal x ", "hacK ", "base64 ",
+]
+NOISE_FILLER = ["the ", "a quiet day ", "\n", "   ", "report. ", "x" * 40 + " "]
+
+
+def _first_regex(text):
+    for i, (rx, _) in enumerate(threat_categories._NOISE_PATTERNS):
+        if rx.search(text):
+            return i
+    return None
+
+
+def test_noise_chains_agree_with_the_noise_regexes():
+    rng = random.Random(15)
+    corpus = [word * n for word in NOISE_WORDS for n in (1, 8, 60)]
+    for _ in range(1500):
+        pool = NOISE_WORDS + NOISE_FILLER * rng.randint(0, 6)
+        corpus.append("".join(rng.choice(pool) for _ in range(rng.randint(2, 80))))
+
+    matched = 0
+    for text in corpus:
+        expected = _first_regex(text)
+        assert threat_categories._NOISE_CHAINS.first(text) == expected, text
+        matched += expected is not None
+    # the corpus reaches every rule, and clean text too
+    assert 0 < matched < len(corpus)
+    assert {_first_regex(t) for t in corpus} >= set(range(len(threat_categories._NOISE_PATTERNS)))
@@ -0,0 +1,15 @@
+import time
+
+from anticipator.detection import pool
+
+
+def test_another_worker_count_leaves_submitted_work_alone():
+    try:
+        first = pool.get_pool(1)
+        future = first.submit(time.sleep, 0.2)
+        assert pool.get_pool(2) is not first
+        assert future.result(timeout=30) is None
+        assert pool.get_pool(1) is first
+        assert first.submit(abs, -3).result(timeout=30) == 3
+    finally:
+        pool.shutdown_pool()
@@ -0,0 +1,33 @@
+import re
+
+from anticipator.detection.core.prefilter import LiteralPrefilter, fold_case
+from anticipator.detection.signatures import CREDENTIAL_PATTERNS
+
+KEY = "a1B2c3D4e5F6g7H8i9J0k1L2m3N4"
+
+TEXTS = [
+    f"stripe key sk_live_{KEY}",
+    f"stripe key ſk_live_{KEY}",            # U+017F LATIN SMALL LETTER LONG S
+    "aws AKIA" + "ABCDEFGHIJKLMNOP",          # U+212A KELVIN SIGN
+    "İ token: GITHUB_TOKEN=" + KEY,           # U+0130 shifts text.lower()
+    f"ghs_{KEY}{KEY}",
+]
+
+
+def test_fold_case_keeps_offsets_and_folds_ignorecase_variants():
+    for text in TEXTS:
+        assert len(fold_case(text)) == len(text)
+    assert fold_case("ſK_LIVE") == "sk_live"
+
+
+def test_gated_counts_match_plain_findall():
+    prefilter = LiteralPrefilter(CREDENTIAL_PATTERNS)
+    for text in TEXTS:
+        expected = []
+        for idx, (pattern, _) in enumerate(CREDENTIAL_PATTERNS):
+            count = len(re.findall(pattern, text, re.IGNORECASE))
+            if count:
+                expected.append((idx, count))
+        assert expected
+        assert prefilter.counts(text) == expected
+        assert prefilter.counts(text, text.lower()) == expected
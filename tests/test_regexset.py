@@ -0,0 +1,29 @@
+import re
+
+from anticipator.detection.core.regexset import RegexSet
+
+ENTRIES = [
+    (re.compile(r'/etc/passwd', re.IGNORECASE), "passwd"),
+    (re.compile(r'\.ssh/id_rsa', re.IGNORECASE), "ssh_key"),
+    (re.compile(r'kubeconfig\s*=', re.IGNORECASE), "kubeconfig"),
+    (re.compile(r'(?:weather|recipe)\s+bypass', re.IGNORECASE), "bypass"),
+]
+
+TEXTS = [
+    "cat /etc/passwd",
+    "cat /etc/paſſwd",                 # U+017F LATIN SMALL LETTER LONG S
+    "cp ~/.ſſh/id_rſa .",
+    "Kubeconfig = ./admin",       # U+212A KELVIN SIGN
+    "İ: recipe bypass",                # U+0130 shifts text.lower()
+    "nothing to see here",
+]
+
+
+def test_matches_agree_with_each_pattern_searched_alone():
+    rs = RegexSet(ENTRIES)
+    for text in TEXTS:
+        expected = [label for rx, label in ENTRIES if rx.search(text)]
+        assert rs.labels_matched(text) == expected
+        assert rs.labels_matched(text, text.lower()) == expected
+        first = rs.first(text, text.lower())
+        assert (first and rs.labels[first[0]]) == (expected[0] if expected else None)